@@ -8,25 +8,39 @@
 - 施設ごとの時間帯ラベル→時刻レンジの辞書を内蔵（南浦和/岩槻/岸町/鈴谷/駒場）
 """
 import os
+import argparse
 import sys
 import json
 import re
+import copy
 import datetime
 import time
+import random
+import threading
+import fnmatch
+import heapq
+import hashlib
+import base64
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any, List
-from playwright.sync_api import sync_playwright
+from typing import Optional, Tuple, Dict, Any, List, FrozenSet
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # ====== 環境 ======
+# JST の tzinfo はモジュール読み込み時に 1 回だけ解決（tz データが無い環境では固定 +9:00）
 try:
-    import pytz
+    from zoneinfo import ZoneInfo
+    _JST = ZoneInfo("Asia/Tokyo")
 except Exception:
-    pytz = None
+    _JST = datetime.timezone(datetime.timedelta(hours=9), "JST")  # 日本は夏時間なし
 try:
-    import jpholiday  # 祝日判定（任意）
+    import orjson  # JSON 書き出しの高速化（任意）
 except Exception:
-    jpholiday = None
+    orjson = None
 BASE_URL = os.getenv("BASE_URL")
 DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL", "").strip()
 MONITOR_FORCE = os.getenv("MONITOR_FORCE", "0").strip() == "1"
@@ -39,6 +53,15 @@ try:
     GRACE_MS = max(0, int(os.getenv("GRACE_MS", str(GRACE_MS_DEFAULT))))
 except Exception:
     GRACE_MS = GRACE_MS_DEFAULT
+try:
+    MAX_PARALLEL_FACILITIES = max(1, int(os.getenv("MAX_PARALLEL_FACILITIES", "1")))  # 施設の並列処理数
+except Exception:
+    MAX_PARALLEL_FACILITIES = 1
+try:
+    NOTIFY_DEDUP_MINUTES = max(0, int(os.getenv("NOTIFY_DEDUP_MINUTES", "0")))  # 同一内容の再通知を抑止する時間（0 で無効）
+except Exception:
+    NOTIFY_DEDUP_MINUTES = 0
+DISCORD_BATCH = os.getenv("DISCORD_BATCH", "0").strip() == "1"  # 1 なら通知を実行末尾でまとめて送る
 INCLUDE_HOLIDAY_FLAG = os.getenv("DISCORD_INCLUDE_HOLIDAY", "1").strip() == "1"
 BASE_DIR = Path(__file__).resolve().parent
 OUTPUT_ROOT = Path(os.getenv("OUTPUT_DIR", str(BASE_DIR / "snapshots"))).resolve()
@@ -52,6 +75,9 @@ FACILITY_TITLE_ALIAS = {
     "鈴谷公民館": "鈴谷",
     "浦和駒場体育館": "駒場",
 }
+# 年月表記（画面上の表記揺れ用 / 内部で扱う「YYYY年M月」用）
+_YM_RE = re.compile(r"(\d{4})\s*年\s*(\d{1,2})\s*月")
+_YM_MATCH_RE = re.compile(r"(\d{4})年(\d{1,2})月")
 # 巡回用：短縮名→施設コード（BldCd）/config に facility_code が無い場合のフォールバック用
 FACILITY_ALIAS_TO_BLDCD = {
     "南浦和": "5140",
@@ -84,8 +110,10 @@ FACILITY_TIME_MAP = {
 # ====== ユーティリティ ======
 @contextmanager
 def time_section(title: str):
+    # 通常は終了行（所要時間つき）だけを出す。開始行は TIMING_VERBOSE=1 の時のみ
     start = time.perf_counter()
-    print(f"[TIMER] {title}: start", flush=True)
+    if TIMING_VERBOSE:
+        print(f"[TIMER] {title}: start", flush=True)
     try:
         yield
     finally:
@@ -93,10 +121,7 @@ def time_section(title: str):
         print(f"[TIMER] {title}: end ({end - start:.3f}s)", flush=True)
 
 def jst_now() -> datetime.datetime:
-    if pytz is None:
-        return datetime.datetime.now()
-    jst = pytz.timezone("Asia/Tokyo")
-    return datetime.datetime.now(jst)
+    return datetime.datetime.now(_JST)
 
 def is_within_monitoring_window(start_hour=5, end_hour=23):
     try:
@@ -117,36 +142,139 @@ def ensure_root_dir(root: Path) -> None:
 def safe_mkdir(d: Path):
     d.mkdir(parents=True, exist_ok=True)
 
-def safe_write_text(p: Path, s: str):
+def safe_write_bytes(p: Path, b: bytes):
     p.parent.mkdir(parents=True, exist_ok=True)
     tmp = p.with_suffix(p.suffix + ".tmp")
-    tmp.write_text(s, "utf-8")
+    tmp.write_bytes(b)
     tmp.replace(p)
 
-def safe_element_screenshot(el, out: Path):
-    out.parent.mkdir(parents=True, exist_ok=True)
-    el.scroll_into_view_if_needed()
-    el.screenshot(path=str(out))
+def _dumps(obj) -> bytes:
+    """ 保存用 JSON（インデント 2・非 ASCII そのまま）を UTF-8 バイト列で返す """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+def _loads(raw: bytes):
+    """ UTF-8 バイト列の JSON をそのまま解析（orjson があれば使う） """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def write_bytes_direct(p: Path, data: bytes) -> None:
+    """ 一時ファイルを介さず os.write で直接書き込む（デバッグ証跡など大きめの HTML 用） """
+    p.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(p), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            n = os.write(fd, view)
+            view = view[n:]
+    finally:
+        os.close(fd)
+
+def dump_page_html(page, out: Path) -> None:
+    write_bytes_direct(out, page.inner_html("body").encode("utf-8"))
+
+# 証跡ファイルの書き込み用（ブラウザ操作と並行してディスク I/O を進める）
+_IO_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="io")
+_IO_PENDING: List[Any] = []
+_IO_LOCK = threading.Lock()
+
+def submit_io(fn, *args) -> None:
+    fut = _IO_POOL.submit(fn, *args)
+    with _IO_LOCK:
+        _IO_PENDING.append(fut)
+
+def wait_io() -> None:
+    """ 投入済みの書き込みがすべて終わるまで待つ（失敗はログのみ） """
+    with _IO_LOCK:
+        pending = _IO_PENDING[:]
+        _IO_PENDING.clear()
+    for fut in pending:
+        try:
+            fut.result()
+        except Exception as e:
+            print(f"[WARN] background write failed: {e}", flush=True)
 
 # ====== コンフィグ ======
-def load_config() -> Dict[str, Any]:
-    text = CONFIG_PATH.read_text("utf-8")
-    cfg = json.loads(text)
+def _load_config_raw(path: Path) -> Dict[str, Any]:
+    try:
+        cfg = _loads(path.read_bytes())
+    except ValueError as e:  # json.JSONDecodeError / orjson.JSONDecodeError はどちらも ValueError
+        raise RuntimeError(f"config.json の JSON 解析に失敗しました: {e}") from e
     for key in ["facilities", "status_patterns", "css_class_patterns"]:
         if key not in cfg:
             raise RuntimeError(f"config.json の '{key}' が不足しています")
+    # 通知・保存・ログで使う短縮名を施設ごとに 1 回だけ求めておく
+    for f in cfg.get("facilities", []):
+        name = f.get("name", "")
+        f["_short"] = FACILITY_TITLE_ALIAS.get(name, name) or name
     return cfg
 
+# (パス, mtime_ns, size) → 解析済み config。ファイルが更新されたときだけ読み直す
+_CONFIG_CACHE: Dict[str, Any] = {"key": None, "value": None}
+def load_config() -> Dict[str, Any]:
+    """ 呼び出し側が書き換えてもキャッシュが汚れないよう複製を返す """
+    st = CONFIG_PATH.stat()
+    key = (str(CONFIG_PATH), st.st_mtime_ns, st.st_size)
+    if _CONFIG_CACHE["key"] != key:
+        _CONFIG_CACHE["value"] = _load_config_raw(CONFIG_PATH)
+        _CONFIG_CACHE["key"] = key
+    return copy.deepcopy(_CONFIG_CACHE["value"])
+
 # ====== 不要リソースブロック（任意） ======
-def enable_fast_routes(page):
-    block_exts = (".woff", ".woff2", ".ttf")
-    block_hosts = ("www.google-analytics.com", "googletagmanager.com")
+# 画像・CSS はスクリーンショット（証跡）に必要なので残し、フォント・動画音声・解析タグだけ止める
+_BLOCK_RESOURCE_TYPES = frozenset({"font", "media"})
+# フォント拡張子（クエリ付きも含む）と解析タグのホストを 1 本の正規表現で判定
+_BLOCK_URL_RE = re.compile(r"\.(?:woff2?|ttf)(?:[?#]|$)|www\.google-analytics\.com|googletagmanager\.com")
+def enable_fast_routes(context):
+    """ context 単位で 1 回だけ登録（以降の全ページ・全遷移に適用） """
+    # 登録済みの印は context 自身に持たせる（閉じた context と一緒に破棄され、id() の再利用で取り違えない）
+    if getattr(context, "_fm_fast_routes", False):
+        return
+    context._fm_fast_routes = True
     def handler(route):
-        url = route.request.url
-        if url.endswith(block_exts) or any(h in url for h in block_hosts):
+        req = route.request
+        if req.resource_type in _BLOCK_RESOURCE_TYPES or _BLOCK_URL_RE.search(req.url):
             return route.abort()
         return route.continue_()
-    page.route("**/*", handler)
+    context.route("**/*", handler)
+
+# ブラウザ側（CDP Network.setBlockedURLs）で落とす URL パターン。Python へのリクエスト通知が発生しない
+FAST_BLOCKED_URLS = [
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*connect.facebook.net*",
+]
+def enable_fast_blocking(page) -> None:
+    """ ページ単位で CDP のブロックリストを設定（失敗時は context.route 版へフォールバック） """
+    try:
+        session = _cdp_session(page)
+        session.send("Network.enable")
+        session.send("Network.setBlockedURLs", {"urls": FAST_BLOCKED_URLS})
+    except Exception as e:
+        print(f"[WARN] CDP blocking unavailable, falling back to route: {e}", flush=True)
+        enable_fast_routes(page.context)
+
+# ====== コンテキスト初期化（アニメーション無効化・既定タイムアウト） ======
+NO_ANIMATION_INIT_SCRIPT = """
+(() => {
+  const css = '*{animation-duration:0s !important; transition-duration:0s !important;}';
+  const add = () => {
+    const s = document.createElement('style');
+    s.textContent = css;
+    (document.head || document.documentElement).appendChild(s);
+  };
+  if (document.documentElement) add();
+  else document.addEventListener('DOMContentLoaded', add, { once: true });
+})();
+"""
+def setup_context(context) -> None:
+    context.add_init_script(NO_ANIMATION_INIT_SCRIPT)
+    context.set_default_timeout(5000)
+    if FAST_ROUTES:
+        # 以降に開くページごとに CDP でブロック（全リクエストを Python で仲介しない）
+        context.on("page", enable_fast_blocking)
 
 # ====== 保険待機 ======
 def grace_pause(page, label: str = "grace wait"):
@@ -154,40 +282,52 @@ def grace_pause(page, label: str = "grace wait"):
     if ms_cap <= 0:
         return
     with time_section(f"{label} (adaptive, <= {ms_cap}ms)"):
-        step = 200
-        spent = 0
-        page.wait_for_timeout(step); spent += step
+        # 固定ステップのポーリングはせず、セル数が揃った時点で即座に抜ける
         try:
-            while spent < ms_cap:
-                cells = page.locator("[role='gridcell'], table.reservation-calendar tbody td, .fc-daygrid-day, .calendar-day")
-                if cells.count() >= 28:
-                    break
-                remaining = ms_cap - spent
-                wait_ms = step if remaining >= step else remaining
-                if wait_ms <= 0:
-                    break
-                page.wait_for_timeout(wait_ms)
-                spent += wait_ms
+            page.wait_for_function(_CALENDAR_CELLS_READY_JS, timeout=ms_cap)
         except Exception:
             pass
 
 # ====== Playwright 操作 ======
+# (ラベル, 完全一致か) → Locator をページ自身に保持（ページと一緒に破棄される）。
+# Locator は遅延評価なので遷移後も再利用できる
+def _label_locator(page, label: str, exact: bool):
+    cache: Optional[Dict[Tuple[str, bool], Any]] = getattr(page, "_fm_label_locs", None)
+    if cache is None:
+        cache = page._fm_label_locs = {}
+    key = (label, exact)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    if exact:
+        loc = (page.get_by_role("link", name=label, exact=True)
+               .or_(page.get_by_role("button", name=label, exact=True))
+               .or_(page.get_by_text(label, exact=True))).first
+    else:
+        loc = page.locator(f"text={label}").first
+    cache[key] = loc
+    return loc
+
 def try_click_text(page, label: str, timeout_ms: int = 5000, quiet=True) -> bool:
-    locators = [
-        page.get_by_role("link", name=label, exact=True),
-        page.get_by_role("button", name=label, exact=True),
-        page.get_by_text(label, exact=True),
-        page.locator(f"text={label}"),
-    ]
+    # 完全一致（リンク / ボタン / テキスト）は or_ で 1 つにまとめ、待機 1 回で最初に現れたものを押す
+    exact = _label_locator(page, label, exact=True)
+    loose = _label_locator(page, label, exact=False)
+    try:
+        # 完全一致・部分一致のどちらかが現れるまでを 1 回だけ待つ（完全一致が無い時に 2 倍待たない）
+        exact.or_(loose).first.wait_for(timeout=timeout_ms)
+        # 部分一致は文書順で別要素を拾い得るので、完全一致があればそちらを優先する
+        locators = [exact, loose] if exact.count() > 0 else [loose]
+    except Exception as e:
+        if not quiet:
+            print(f"[WARN] try_click_text: {e} (label='{label}')", flush=True)
+        return False
     for locator in locators:
         try:
             if TIMING_VERBOSE:
-                with time_section(f"click '{label}' (wait+click)"):
-                    locator.wait_for(timeout=timeout_ms)
+                with time_section(f"click '{label}' (click)"):
                     locator.scroll_into_view_if_needed()
                     locator.click(timeout=timeout_ms)
             else:
-                locator.wait_for(timeout=timeout_ms)
                 locator.scroll_into_view_if_needed()
                 locator.click(timeout=timeout_ms)
             return True
@@ -198,23 +338,57 @@ def try_click_text(page, label: str, timeout_ms: int = 5000, quiet=True) -> bool
     return False
 
 OPTIONAL_DIALOG_LABELS = ["同意する", "OK", "確認", "閉じる"]
+# 画面上（本文テキスト・aria-label/title/value/alt）に現れているラベルを 1 往復で調べる。
+# 文言が完全一致するボタン/リンクがあれば data-fm-dialog 属性で印を付け、[ラベル, 印番号(無ければ -1)] を返す
+_OPTIONAL_DIALOG_PROBE_JS = """
+(labels) => {
+  // 前回の呼び出しで付けた印は消す（番号は毎回 0 から振るため、古い要素が同じ番号で残らないように）
+  document.querySelectorAll('[data-fm-dialog]').forEach(e => e.removeAttribute('data-fm-dialog'));
+  const texts = [(document.body && document.body.innerText) || ''];
+  for (const el of document.querySelectorAll('[aria-label],[title],input[value],img[alt]')) {
+    texts.push(el.getAttribute('aria-label') || '', el.getAttribute('title') || '',
+               el.getAttribute('value') || '', el.getAttribute('alt') || '');
+  }
+  const hay = texts.join('\\n').toLowerCase();
+  const present = labels.filter(l => hay.includes(l.toLowerCase()));
+  const clickable = Array.from(document.querySelectorAll("a, button, input[type='button'], input[type='submit'], [role='button']"));
+  return present.map((l, i) => {
+    const el = clickable.find(e => ((e.tagName === 'INPUT' ? e.value : e.textContent) || '').trim() === l
+                                   && e.getClientRects().length > 0);
+    if (!el) return [l, -1];
+    el.setAttribute('data-fm-dialog', String(i));
+    return [l, i];
+  });
+}
+"""
 def click_optional_dialogs_fast(page) -> None:
-    for label in OPTIONAL_DIALOG_LABELS:
+    try:
+        present = page.evaluate(_OPTIONAL_DIALOG_PROBE_JS, OPTIONAL_DIALOG_LABELS)
+    except Exception:
+        present = [[label, -1] for label in OPTIONAL_DIALOG_LABELS]
+    if not present:
+        return  # ダイアログ類の文言が無ければ個別プローブ自体を省く
+    for label, mark in present:
         with time_section(f"optional-dialog: '{label}'"):
             clicked = False
-            probes = [
-                page.get_by_role("link", name=label, exact=True),
-                page.get_by_role("button", name=label, exact=True),
-                page.get_by_text(label, exact=True),
-                page.locator(f"text={label}"),
-            ]
+            if mark >= 0:
+                # 印の付いた要素を直接クリック（候補ごとの count() 往復なし）
+                try:
+                    el = page.locator(f"[data-fm-dialog='{mark}']").first
+                    el.scroll_into_view_if_needed()
+                    el.click(timeout=500)
+                    continue
+                except Exception:
+                    pass
+            # 完全一致 3 種は 1 つの or_ Locator にまとめ、count() の往復を 4 回 → 2 回に
+            probes = [_label_locator(page, label, exact=True), _label_locator(page, label, exact=False)]
             for probe in probes:
                 try:
                     c = probe.count()
                     if c > 0:
                         try:
-                            probe.first.scroll_into_view_if_needed()
-                            probe.first.click(timeout=500)
+                            probe.scroll_into_view_if_needed()
+                            probe.click(timeout=500)
                             clicked = True
                             break
                         except Exception:
@@ -238,18 +412,13 @@ HINTS: Dict[str, str] = {
     "屋内スポーツ": ".tcontent",
     "バドミントン": ".tcontent",
 }
+_NEXT_STEP_READY_JS = "(a) => location.href !== a.url || (!!a.css && document.querySelector(a.css) !== null)"
 def wait_next_step_ready(page, css_hint: Optional[str] = None) -> None:
-    deadline = time.perf_counter() + 0.9
-    last_url = page.url
-    while time.perf_counter() < deadline:
-        try:
-            if page.url != last_url:
-                return
-            if css_hint and page.locator(css_hint).count() > 0:
-                return
-        except Exception:
-            pass
-        page.wait_for_timeout(120)
+    """ URL が変わるか css_hint が現れた時点で戻る（最大 0.9 秒）。遷移で文脈が破棄された場合も完了扱い """
+    try:
+        page.wait_for_function(_NEXT_STEP_READY_JS, arg={"url": page.url, "css": css_hint or ""}, timeout=900)
+    except Exception:
+        pass
 
 def _run_pre_actions(page, actions: List[str]):
     if not actions:
@@ -305,10 +474,6 @@ def click_sequence_fast(page, labels: List[str], facility: Dict[str, Any] = None
 # ====== ナビゲーション ======
 def navigate_to_facility(page, facility: Dict[str, Any]) -> None:
     page.goto(BASE_URL, wait_until="domcontentloaded", timeout=30000)
-    if FAST_ROUTES:
-        enable_fast_routes(page)
-    page.add_style_tag(content="*{animation-duration:0s !important; transition-duration:0s !important;}")
-    page.set_default_timeout(5000)
     click_optional_dialogs_fast(page)
     click_sequence_fast(page, facility.get("click_sequence", []), facility)
     # post-step（部屋選択など）
@@ -317,19 +482,16 @@ def navigate_to_facility(page, facility: Dict[str, Any]) -> None:
     wait_calendar_ready(page, facility)
 
 # ====== カレンダー準備 ======
+_CALENDAR_CELLS_READY_JS = """
+() => document.querySelectorAll("[role='gridcell'], table.reservation-calendar tbody td, .fc-daygrid-day, .calendar-day").length >= 28
+"""
 def wait_calendar_ready(page, facility: Dict[str, Any]) -> None:
     with time_section("wait calendar root ready"):
-        deadline = time.perf_counter() + 1.5
-        while time.perf_counter() < deadline:
-            try:
-                cells = page.locator(
-                    "[role='gridcell'], table.reservation-calendar tbody td, .fc-daygrid-day, .calendar-day"
-                )
-                if cells.count() >= 28:
-                    return
-            except Exception:
-                pass
-            page.wait_for_timeout(150)
+        try:
+            page.wait_for_function(_CALENDAR_CELLS_READY_JS, timeout=1500)
+            return
+        except Exception:
+            pass
     sel_cfg = facility.get("calendar_selector") or "table.m_akitablelist"
     try:
         page.locator(sel_cfg).first.wait_for(state="visible", timeout=300)
@@ -345,7 +507,7 @@ def wait_calendar_ready(page, facility: Dict[str, Any]) -> None:
 
 # ====== 月テキスト＆ルート ======
 def get_current_year_month_text(page, calendar_root=None) -> Optional[str]:
-    pat = re.compile(r"(\d{4})\s*年\s*(\d{1,2})\s*月")
+    pat = _YM_RE
     targets: List[str] = []
     if calendar_root is None:
         locs = [
@@ -378,6 +540,60 @@ def get_current_year_month_text(page, calendar_root=None) -> Optional[str]:
             return f"{y}年{mo}月"
     return None
 
+_CAL_WEEKDAY_MARKERS = ["日曜日","月曜日","火曜日","水曜日","木曜日","金曜日","土曜日","日","月","火","水","木","金","土"]
+# 1 要素分のカレンダーらしさ（ヒント文字列 +2 / 曜日 4 種以上 +3 / 日セル 28 以上 +3）をブラウザ内で算出
+# innerText はレイアウト計算を伴うので textContent で判定し、可視性は最終候補だけ確認する
+_CAL_SCORE_JS = """
+(el, args) => {
+  const t = (el.textContent || '').trim();
+  let score = 0;
+  if (args.hint && t.includes(args.hint)) score += 2;
+  let wk = 0;
+  for (const w of args.markers) if (t.includes(w)) wk++;
+  if (wk >= 4) score += 3;
+  const cells = el.querySelectorAll(":scope tbody td, :scope [role='gridcell'], :scope .fc-daygrid-day, :scope .calendar-day");
+  if (cells.length >= 28) score += 3;
+  return score;
+}
+"""
+# 候補セレクタ（前ほど優先）。1 つに結合して DOM を 1 回だけ走査し、要素ごとに [スコア, 最初に一致したセレクタ順位] を返す
+_CAL_ROOT_SELECTORS = ("[role='grid']", "table", "section", "div.calendar", "div")
+_CAL_SCORE_ALL_JS = f"(els, args) => els.map(el => [({_CAL_SCORE_JS.strip()})(el, args), args.sels.findIndex(s => el.matches(s))])"
+# 要素の同一性チェック用: [スコア, 一致セレクタ順位, タグ名, id, class]
+_CAL_ROOT_SIG_JS = f"""
+(el, args) => [({_CAL_SCORE_JS.strip()})(el, args), args.sels.findIndex(s => el.matches(s)),
+               el.tagName, el.id || '', el.getAttribute('class') || '']
+"""
+# 施設名 → (前回特定したカレンダー枠, そのスコア, 要素の特徴 (順位, タグ名, id, class)) をページ自身に保持。
+# 月移動後も同じ位置に同じ種類の要素があり、同点以上なら再走査しない（位置だけでは別要素を拾い得るため）
+def _cal_root_cache(page) -> Dict[str, Tuple[Any, int, Tuple[int, str, str, str]]]:
+    cache = getattr(page, "_fm_cal_root", None)
+    if cache is None:
+        cache = page._fm_cal_root = {}
+    return cache
+
+def _is_visible_quiet(el) -> bool:
+    try:
+        return el.is_visible()
+    except Exception:
+        return False
+
+def _cached_calendar_root(page, hint: str, facility: Optional[Dict[str, Any]]):
+    name = (facility or {}).get("name", "")
+    cache = _cal_root_cache(page)
+    cached = cache.get(name)
+    if not name or not cached:
+        return None
+    try:
+        args = {"hint": hint, "markers": _CAL_WEEKDAY_MARKERS, "sels": list(_CAL_ROOT_SELECTORS)}
+        score, *sig = cached[0].evaluate(_CAL_ROOT_SIG_JS, args)
+        if tuple(sig) == cached[2] and score >= cached[1]:
+            return cached[0]
+    except Exception:
+        pass
+    cache.pop(name, None)
+    return None
+
 def locate_calendar_root(page, hint: str, facility: Dict[str, Any] = None):
     with time_section("locate_calendar_root"):
         sel_cfg = (facility or {}).get("calendar_selector")
@@ -385,37 +601,35 @@ def locate_calendar_root(page, hint: str, facility: Dict[str, Any] = None):
             loc = page.locator(sel_cfg)
             if loc.count() > 0:
                 return loc.first
-        candidates = []
-        weekday_markers = ["日曜日","月曜日","火曜日","水曜日","木曜日","金曜日","土曜日","日","月","火","水","木","金","土"]
-        for sel in ("[role='grid']", "table", "section", "div.calendar", "div"):
-            loc = page.locator(sel)
-            cnt = loc.count()
-            for i in range(cnt):
-                el = loc.nth(i)
-                try:
-                    t = (el.inner_text() or "").strip()
-                except Exception:
-                    continue
-                score = 0
-                if hint and hint in t: score += 2
-                wk = sum(1 for w in weekday_markers if w in t)
-                if wk >= 4: score += 3
-                try:
-                    cells = el.locator(":scope tbody td, :scope [role='gridcell'], :scope .fc-daygrid-day, :scope .calendar-day")
-                    if cells.count() >= 28: score += 3
-                except Exception:
-                    pass
-                if score >= 5:
-                    candidates.append((score, el))
+        cached = _cached_calendar_root(page, hint, facility)
+        if cached is not None:
+            return cached
+        args = {"hint": hint, "markers": _CAL_WEEKDAY_MARKERS, "sels": list(_CAL_ROOT_SELECTORS)}
+        loc = page.locator(", ".join(_CAL_ROOT_SELECTORS))
+        # 結合セレクタで 1 往復・重複なしに全要素のスコアを取得
+        try:
+            results = loc.evaluate_all(_CAL_SCORE_ALL_JS, args)
+        except Exception:
+            results = []
+        # 同点ならセレクタの優先順 → 文書順（従来のセレクタ別走査と同じ並び）
+        ranked = sorted(((score, rank, i) for i, (score, rank) in enumerate(results) if score >= 5),
+                        key=lambda c: (-c[0], c[1], c[2]))
+        candidates = [(score, loc.nth(i)) for score, _rank, i in ranked]
         if not candidates:
             raise RuntimeError("カレンダー枠の特定に失敗（候補が見つからないため監視を中止）。")
-        candidates.sort(key=lambda x: x[0], reverse=True)
-        return candidates[0][1]
+        best_score, best = next(((sc, el) for sc, el in candidates if _is_visible_quiet(el)), candidates[0])
+        if (facility or {}).get("name"):
+            try:
+                _score, *sig = best.evaluate(_CAL_ROOT_SIG_JS, args)
+                _cal_root_cache(page)[facility["name"]] = (best, best_score, tuple(sig))
+            except Exception:
+                _cal_root_cache(page).pop(facility["name"], None)
+        return best
 
 # ====== ★月移動（従来のコード＋ガード） ======
 def _compute_next_month_text(prev: str) -> str:
     try:
-        m = re.match(r"(\d{4})年(\d{1,2})月", prev or "")
+        m = _YM_MATCH_RE.match(prev or "")
         if not m: return ""
         y, mo = int(m.group(1)), int(m.group(2))
         if mo == 12:
@@ -427,7 +641,7 @@ def _compute_next_month_text(prev: str) -> str:
         return ""
 
 def _next_yyyymm01(prev: str) -> Optional[str]:
-    m = re.match(r"(\d{4})年(\d{1,2})月", prev or "")
+    m = _YM_MATCH_RE.match(prev or "")
     if not m: return None
     y, mo = int(m.group(1)), int(m.group(2))
     if mo == 12:
@@ -438,7 +652,7 @@ def _next_yyyymm01(prev: str) -> Optional[str]:
 
 def _ym(text: Optional[str]) -> Optional[Tuple[int,int]]:
     if not text: return None
-    m = re.match(r"(\d{4})年(\d{1,2})月", text)
+    m = _YM_MATCH_RE.match(text)
     return (int(m.group(1)), int(m.group(2))) if m else None
 
 def _is_forward(prev: str, cur: str) -> bool:
@@ -447,7 +661,14 @@ def _is_forward(prev: str, cur: str) -> bool:
     (py, pm), (cy, cm) = p, c
     return (pm == 12 and cy == py + 1 and cm == 1) or (cy == py and cm == pm + 1)
 
-def click_next_month(page, label_primary="次の月", calendar_root=None, prev_month_text=None, wait_timeout_ms=20000, facility=None) -> bool:
+# 翌月表示の待機上限（表示が詰まっているときに 20 秒待ち続けない）
+NEXT_MONTH_WAIT_MS = 8000
+# 施設名 → 前回「翌月」クリックに成功したセレクタ（次回はそれを最初に試す）
+_NEXT_MONTH_SEL_CACHE: Dict[str, str] = {}
+# 月送りリンク href の遷移先日付 (YYYYMMDD)
+_MOVE_CALENDER_RE = re.compile(r"moveCalender\([^,]+,[^,]+,\s*(\d{8})\)")
+
+def click_next_month(page, label_primary="次の月", calendar_root=None, prev_month_text=None, wait_timeout_ms=NEXT_MONTH_WAIT_MS, facility=None) -> bool:
     def _safe_click(el, note=""):
         if TIMING_VERBOSE:
             with time_section(f"next-month click {note}"):
@@ -462,34 +683,36 @@ def click_next_month(page, label_primary="次の月", calendar_root=None, prev_m
             return False
 
         clicked = False
+        fac_name = (facility or {}).get("name", "")
         sel_cfg = (facility or {}).get("next_month_selector")
-        cands = [sel_cfg] if sel_cfg else []
-        cands += ["a:has-text('次の月')", "a:has-text('翌月')"]
-        for sel in cands:
-            if not sel: continue
+        cands = [_NEXT_MONTH_SEL_CACHE.get(fac_name), sel_cfg, "a:has-text('次の月')", "a:has-text('翌月')"]
+        for sel in dict.fromkeys(c for c in cands if c):
             try:
                 el = page.locator(sel).first
                 if el and el.count() > 0:
-                    _safe_click(el, sel); clicked = True; break
+                    _safe_click(el, sel); clicked = True
+                    if fac_name: _NEXT_MONTH_SEL_CACHE[fac_name] = sel
+                    break
             except Exception: pass
         if not clicked and prev_month_text:
             try:
                 target = _next_yyyymm01(prev_month_text)
-                els = page.locator("a[href*='moveCalender']").all()
+                anchors = page.locator("a[href*='moveCalender']")
+                # href は 1 往復でまとめて取得（リンクごとの get_attribute 往復をしない）
+                hrefs = anchors.evaluate_all("els => els.map(e => e.getAttribute('href') || '')")
                 chosen = None; chosen_date = None
                 cur01 = None
-                m = re.match(r"(\d{4})年(\d{1,2})月", prev_month_text)
+                m = _YM_MATCH_RE.match(prev_month_text)
                 if m: cur01 = f"{int(m.group(1)):04d}{int(m.group(2)):02d}01"
-                for e in els:
-                    href = e.get_attribute("href") or ""
-                    m2 = re.search(r"moveCalender\([^,]+,[^,]+,\s*(\d{8})\)", href)
+                for i, href in enumerate(hrefs):
+                    m2 = _MOVE_CALENDER_RE.search(href)
                     if not m2: continue
                     ymd = m2.group(1)
-                    if target and ymd == target: chosen, chosen_date = e, ymd; break
+                    if target and ymd == target: chosen, chosen_date = i, ymd; break
                     if cur01 and ymd > cur01 and (chosen_date is None or ymd < chosen_date):
-                        chosen, chosen_date = e, ymd
-                if chosen:
-                    _safe_click(chosen, f"href {chosen_date}"); clicked = True
+                        chosen, chosen_date = i, ymd
+                if chosen is not None:
+                    _safe_click(anchors.nth(chosen), f"href {chosen_date}"); clicked = True
             except Exception:
                 pass
     if not clicked:
@@ -503,7 +726,7 @@ def click_next_month(page, label_primary="次の月", calendar_root=None, prev_m
                     arg=goal, timeout=wait_timeout_ms
                 )
         except Exception:
-            pass
+            print(f"[WARN] next-month: '{goal}' not shown within {wait_timeout_ms}ms", flush=True)
     with time_section("next-month: confirm direction"):
         cur = None
         try: cur = get_current_year_month_text(page, calendar_root=None)
@@ -514,88 +737,112 @@ def click_next_month(page, label_primary="次の月", calendar_root=None, prev_m
     return True
 
 # ====== 集計（従来の月表示解析） ======
+# 月表示解析用の正規表現（セルごと・属性ごとに再コンパイルしない）
+_TD_RE = re.compile(r"\<td\b([^\>]*)\>(.*?)</td\>", re.IGNORECASE | re.DOTALL)
+_IMG_RE = re.compile(r"\<img\b([^\>]*)\>", re.IGNORECASE)
+_ATTR_CLASS_RE = re.compile(r'class\s*=\s*"([^"]*)"', re.IGNORECASE)
+_ATTR_TITLE_RE = re.compile(r'title\s*=\s*"([^"]*)"', re.IGNORECASE)
+_ATTR_ARIA_RE = re.compile(r'aria-label\s*=\s*"([^"]*)"', re.IGNORECASE)
+_ATTR_ALT_RE = re.compile(r'alt\s*=\s*"([^"]*)"', re.IGNORECASE)
+_ATTR_SRC_RE = re.compile(r'src\s*=\s*"([^"]*)"', re.IGNORECASE)
+_TAG_RE = re.compile(r"\<[^>]+\>")
+_WS_RE = re.compile(r"\s+")
+_DAY_RE = re.compile(r"([1-9]\d?|1\d|2\d|3[01])\s*日")
+_DAY_HEAD_RE = re.compile(r"^([1-9]\d?|1\d|2\d|3[01])\s*日", re.MULTILINE)
+_STATUS_CHARS = ("○", "◯", "△", "×")
+
+@lru_cache(maxsize=64)
+def _keywords_re(keywords: Tuple[str, ...]) -> Optional[re.Pattern]:
+    """ キーワード群（config の status_patterns 等）を 1 本の正規表現に。空なら None """
+    return _keyword_alternation(keywords) if keywords else None
+
+def _match_keyword_status(n: str, kw_patterns: Dict[str, List[str]], lower: bool) -> Optional[str]:
+    """ circle → triangle → cross の優先順で、いずれかのキーワードが n に含まれるか """
+    for key, st in (("circle", "○"), ("triangle", "△"), ("cross", "×")):
+        kws = kw_patterns[key]
+        pat = _keywords_re(tuple(k.lower() for k in kws) if lower else tuple(kws))
+        if pat is not None and pat.search(n):
+            return st
+    return None
+
 def _st_from_text_and_src(raw: str, patterns: Dict[str, List[str]]) -> Optional[str]:
     if raw is None:
         return None
     txt = raw.strip()
-    n = txt.replace("　", " ").lower()
-    for ch in ["○", "◯", "△", "×"]:
+    for ch in _STATUS_CHARS:
         if ch in txt:
-            return {"◯": "○"}.get(ch, ch)
-    for kw in patterns["circle"]:
-        if kw.lower() in n: return "○"
-    for kw in patterns["triangle"]:
-        if kw.lower() in n: return "△"
-    for kw in patterns["cross"]:
-        if kw.lower() in n: return "×"
-    return None
+            return "○" if ch == "◯" else ch
+    return _match_keyword_status(txt.replace("　", " ").lower(), patterns, lower=True)
 
 def _status_from_class(cls: str, css_class_patterns: Dict[str, List[str]]) -> Optional[str]:
     if not cls: return None
-    c = cls.lower()
-    for kw in css_class_patterns["circle"]:
-        if kw in c: return "○"
-    for kw in css_class_patterns["triangle"]:
-        if kw in c: return "△"
-    for kw in css_class_patterns["cross"]:
-        if kw in c: return "×"
-    return None
+    return _match_keyword_status(cls.lower(), css_class_patterns, lower=False)
+
+def _attr(pat: re.Pattern, attrs: str) -> str:
+    m = pat.search(attrs)
+    return (m.group(1) or "") if m else ""
 
 def _extract_td_blocks(html: str) -> List[Dict[str, str]]:
     td_blocks: List[Dict[str, str]] = []
-    for m in re.finditer(r"\<td\b([^\>]*)\>(.*?)</td\>", html, flags=re.IGNORECASE | re.DOTALL):
+    for m in _TD_RE.finditer(html):
         attrs = m.group(1) or ""
         inner = m.group(2) or ""
-        cls = ""
-        title = ""
-        aria = ""
-        mcls = re.search(r'class\s*=\s*"([^"]*)"', attrs, flags=re.IGNORECASE)
-        if mcls: cls = mcls.group(1)
-        mtitle = re.search(r'title\s*=\s*"([^"]*)"', attrs, flags=re.IGNORECASE)
-        if mtitle: title = mtitle.group(1)
-        maria = re.search(r'aria-label\s*=\s*"([^"]*)"', attrs, flags=re.IGNORECASE)
-        if maria: aria = maria.group(1)
-        td_blocks.append({"attrs": attrs, "class": cls, "title": title, "aria": aria, "inner": inner})
+        td_blocks.append({"attrs": attrs, "class": _attr(_ATTR_CLASS_RE, attrs), "title": _attr(_ATTR_TITLE_RE, attrs),
+                          "aria": _attr(_ATTR_ARIA_RE, attrs), "inner": inner})
     return td_blocks
 
+def _img_attrs(inner: str) -> List[Tuple[str, str, str]]:
+    """ セル内 <img> の (alt, title, src) 一覧 """
+    out: List[Tuple[str, str, str]] = []
+    for mm in _IMG_RE.finditer(inner):
+        a = mm.group(1) or ""
+        out.append((_attr(_ATTR_ALT_RE, a), _attr(_ATTR_TITLE_RE, a), _attr(_ATTR_SRC_RE, a)))
+    return out
+
+def _extract_cells_regex(html: str) -> List[Dict[str, Any]]:
+    """ 全 <td> の属性・テキストをまとめて取り出す（<img> 属性は必要時に抽出） """
+    return [{"class": td["class"], "title": td["title"], "aria": td["aria"],
+             "text": _inner_text_like(td["inner"]), "inner": td["inner"], "imgs": None}
+            for td in _extract_td_blocks(html)]
+
 def _inner_text_like(html_fragment: str) -> str:
-    s = re.sub(r"\<br\s*/?\>", " ", html_fragment, flags=re.IGNORECASE)
-    s = re.sub(r"\<[^>]+\>", " ", s)
-    s = re.sub(r"\s+", " ", s)
+    s = _TAG_RE.sub(" ", html_fragment)  # <br> もタグとして空白に置き換わる
+    s = _WS_RE.sub(" ", s)
     return s.strip()
 
 def _find_day_in_text(text: str) -> Optional[str]:
-    m = re.search(r"([1-9]\d?|1\d|2\d|3[01])\s*日", text)
+    m = _DAY_RE.search(text)
     return m.group(0) if m else None
 
-def summarize_vacancies(page, calendar_root, config):
+def calendar_outer_html(calendar_root) -> Optional[str]:
+    """ カレンダー枠の outerHTML を 1 回だけ取得（集計と保存で共有する）。失敗時は None """
+    try:
+        return calendar_root.evaluate("el => el.outerHTML")
+    except Exception:
+        return None
+
+def summarize_vacancies(page, calendar_root, config, html: Optional[str] = None):
     with time_section("summarize_vacancies(html-parse)"):
         patterns = config["status_patterns"]
         css_class_patterns = config["css_class_patterns"]
         summary = {"○": 0, "△": 0, "×": 0, "未判定": 0}
         details: List[Dict[str, str]] = []
-        html = ""
-        try:
-            html = calendar_root.evaluate("el => el.outerHTML")
-        except Exception:
+        if html is None:
+            html = calendar_outer_html(calendar_root)
+        if html is None:
             return _summarize_vacancies_fallback(page, calendar_root, config)
-        td_blocks = _extract_td_blocks(html)
-        for td in td_blocks:
-            inner = td["inner"]
-            text_like = _inner_text_like(inner)
+        cells = _extract_cells_regex(html)
+        for td in cells:
+            text_like = td["text"]
+            imgs = td["imgs"]  # 必要になった時点で 1 回だけ抽出
             day = _find_day_in_text(text_like)
             if not day:
                 attr_text = " ".join([td.get("title", ""), td.get("aria", "")])
                 day = _find_day_in_text(attr_text)
             if not day:
-                for mm in re.finditer(r"\<img\b([^\>]*)\>", inner, flags=re.IGNORECASE):
-                    img_attrs = mm.group(1) or ""
-                    alt = ""
-                    ititle = ""
-                    malt = re.search(r'alt\s*=\s*"([^"]*)"', img_attrs, flags=re.IGNORECASE)
-                    if malt: alt = malt.group(1) or ""
-                    mti = re.search(r'title\s*=\s*"([^"]*)"', img_attrs, flags=re.IGNORECASE)
-                    if mti: ititle = mti.group(1) or ""
+                if imgs is None:
+                    imgs = _img_attrs(td["inner"])
+                for alt, ititle, _src in imgs:
                     dd = _find_day_in_text(f"{alt} {ititle}")
                     if dd:
                         day = dd
@@ -604,17 +851,9 @@ def summarize_vacancies(page, calendar_root, config):
                 continue
             st = _st_from_text_and_src(text_like, patterns)
             if not st:
-                for mm in re.finditer(r"\<img\b([^\>]*)\>", inner, flags=re.IGNORECASE):
-                    img_attrs = mm.group(1) or ""
-                    alt = ""
-                    ititle = ""
-                    src = ""
-                    malt = re.search(r'alt\s*=\s*"([^"]*)"', img_attrs, flags=re.IGNORECASE)
-                    if malt: alt = malt.group(1) or ""
-                    mti = re.search(r'title\s*=\s*"([^"]*)"', img_attrs, flags=re.IGNORECASE)
-                    if mti: ititle = mti.group(1) or ""
-                    msrc = re.search(r'src\s*=\s*"([^"]*)"', img_attrs, flags=re.IGNORECASE)
-                    if msrc: src = msrc.group(1) or ""
+                if imgs is None:
+                    imgs = _img_attrs(td["inner"])
+                for alt, ititle, src in imgs:
                     st = _st_from_text_and_src(f"{alt} {ititle} {src}", patterns)
                     if st:
                         break
@@ -626,78 +865,49 @@ def summarize_vacancies(page, calendar_root, config):
             details.append({"day": day, "status": st, "text": text_like})
         return summary, details
 
+# フォールバック解析用：全セルの表示テキスト・属性・<img> 属性を 1 往復で取得
+_FALLBACK_CELLS_JS = """
+el => Array.from(el.querySelectorAll(":scope tbody td, :scope [role='gridcell']")).map(td => ({
+  txt: td.innerText || '',
+  aria: td.getAttribute('aria-label') || '',
+  title: td.getAttribute('title') || '',
+  cls: td.getAttribute('class') || '',
+  imgs: Array.from(td.querySelectorAll('img')).map(i => [i.getAttribute('alt') || '', i.getAttribute('title') || '', i.getAttribute('src') || '']),
+}))
+"""
 def _summarize_vacancies_fallback(page, calendar_root, config):
     with time_section("summarize_vacancies(fallback)"):
-        import re as _re
         patterns = config["status_patterns"]
         summary = {"○": 0, "△": 0, "×": 0, "未判定": 0}
         details: List[Dict[str, str]] = []
         def _st(raw: str) -> Optional[str]:
             return _st_from_text_and_src(raw, patterns)
-        cands = calendar_root.locator(":scope tbody td, :scope [role='gridcell']")
-        for i in range(cands.count()):
-            el = cands.nth(i)
-            try:
-                txt = (el.inner_text() or "").strip()
-            except Exception:
-                continue
-            head = txt[:40]
-            m = _re.search(r"^([1-9]\d?|1\d|2\d|3[01])\s*日", head, flags=_re.MULTILINE)
+        try:
+            cells = calendar_root.evaluate(_FALLBACK_CELLS_JS)
+        except Exception:
+            cells = []
+        for c in cells:
+            txt = (c["txt"] or "").strip()
+            aria, title, imgs = c["aria"], c["title"], c["imgs"]
+            m = _DAY_HEAD_RE.search(txt[:40])
             if not m:
-                try:
-                    aria = el.get_attribute("aria-label") or ""
-                    title = el.get_attribute("title") or ""
-                    m = _re.search(r"([1-9]\d?|1\d|2\d|3[01])\s*日", aria + " " + title)
-                except Exception:
-                    pass
+                m = _DAY_RE.search(aria + " " + title)
             if not m:
-                try:
-                    imgs = el.locator("img"); jcnt = imgs.count()
-                    for j in range(jcnt):
-                        alt = imgs.nth(j).get_attribute("alt") or ""
-                        tit = imgs.nth(j).get_attribute("title") or ""
-                        mm = _re.search(r"([1-9]\d?|1\d|2\d|3[01])\s*日", alt + " " + tit)
-                        if mm:
-                            m = mm
-                            break
-                except Exception:
-                    pass
+                for alt, tit, _src in imgs:
+                    m = _DAY_RE.search(alt + " " + tit)
+                    if m:
+                        break
             if not m:
                 continue
             day = f"{m.group(1)}日"
             st = _st(txt)
             if not st:
-                try:
-                    imgs = el.locator("img"); jcnt = imgs.count()
-                    for j in range(jcnt):
-                        alt = imgs.nth(j).get_attribute("alt") or ""
-                        tit = imgs.nth(j).get_attribute("title") or ""
-                        src = imgs.nth(j).get_attribute("src") or ""
-                        st = _st(alt + " " + tit) or _st(src)
-                        if st:
-                            break
-                except Exception:
-                    pass
+                for alt, tit, src in imgs:
+                    st = _st(alt + " " + tit) or _st(src)
+                    if st:
+                        break
             if not st:
-                try:
-                    aria = el.get_attribute("aria-label") or ""
-                    tit = el.get_attribute("title") or ""
-                    cls = (el.get_attribute("class") or "").lower()
-                    st = _st(aria + " " + tit)
-                    if not st:
-                        for kw in config["css_class_patterns"]["circle"]:
-                            if kw in cls:
-                                st = "○"; break
-                    if not st:
-                        for kw in config["css_class_patterns"]["triangle"]:
-                            if kw in cls:
-                                st = "△"; break
-                    if not st:
-                        for kw in config["css_class_patterns"]["cross"]:
-                            if kw in cls:
-                                st = "×"; break
-                except Exception:
-                    pass
+                st = _st(aria + " " + title) or _status_from_class(c["cls"].lower(), config["css_class_patterns"])
             if not st:
                 st = "未判定"
             summary[st] = summary.get(st, 0) + 1
@@ -706,108 +916,248 @@ def _summarize_vacancies_fallback(page, calendar_root, config):
 
 # ====== 保存・ローテーション ======
 from datetime import datetime as _dt
+# パスに使えない文字の置換
+_UNSAFE_PATH_RE = re.compile(r"[\\/:*?\"<>\n]+")
 def facility_month_dir(short: str, month_text: str) -> Path:
-    safe_fac = re.sub(r"[\\/:*?\"<>\n]+","_", short)
-    safe_month = re.sub(r"[\\/:*?\"<>\n]+","_", month_text or "unknown_month")
+    safe_fac = _UNSAFE_PATH_RE.sub("_", short)
+    safe_month = _UNSAFE_PATH_RE.sub("_", month_text or "unknown_month")
     d = OUTPUT_ROOT / safe_fac / safe_month
     with time_section(f"mkdir outdir: {d}"): safe_mkdir(d)
     return d
 
+# str(path) → ((mtime_ns, size), payload)。呼び出し側は読み取り専用で扱う
+_PAYLOAD_CACHE: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
 def load_last_payload(outdir: Path) -> Optional[Dict[str, Any]]:
     p = outdir / "status_counts.json"
-    if not p.exists(): return None
     try:
-        return json.loads(p.read_text("utf-8"))
+        st = p.stat()
+    except OSError:
+        return None
+    key = str(p)
+    stamp = (st.st_mtime_ns, st.st_size)
+    hit = _PAYLOAD_CACHE.get(key)
+    if hit and hit[0] == stamp:
+        return hit[1]
+    try:
+        data = _loads(p.read_bytes())
     except Exception:
         return None
+    _PAYLOAD_CACHE[key] = (stamp, data)
+    return data
 
 def load_last_summary(outdir: Path):
     payload = load_last_payload(outdir)
     return (payload or {}).get("summary")
 
+_SUMMARY_KEYS = ("○", "△", "×", "未判定")
+def _summary_sig(summary) -> Tuple[int, ...]:
+    """ サマリを比較用のタプル (○, △, ×, 未判定) に """
+    s = summary or {}
+    return tuple(s.get(k, 0) for k in _SUMMARY_KEYS)
+
 def summaries_changed(prev, cur) -> bool:
-    if prev is None and cur is not None: return True
-    if prev is None and cur is None: return False
-    for k in ["○","△","×","未判定"]:
-        if (prev or {}).get(k,0) != (cur or {}) .get(k,0): return True
-    return False
+    if prev is None: return cur is not None
+    return _summary_sig(prev) != _summary_sig(cur)
+
+# 要素の文書座標（スクロール量込み）を 1 往復で取得
+_ELEMENT_CLIP_JS = """
+el => {
+  el.scrollIntoView({block: 'nearest', inline: 'nearest'});
+  const r = el.getBoundingClientRect();
+  return {x: r.left + window.scrollX, y: r.top + window.scrollY, width: r.width, height: r.height};
+}
+"""
+def _cdp_session(page):
+    """ CDP セッションはページ自身に保持して使い回す（ページと一緒に破棄される） """
+    session = getattr(page, "_fm_cdp_session", None)
+    if session is None:
+        session = page._fm_cdp_session = page.context.new_cdp_session(page)
+    return session
+
+def capture_element_png(el) -> bytes:
+    """ 要素の矩形を CDP の Page.captureScreenshot(clip) で直接撮る（失敗時は Locator.screenshot） """
+    try:
+        clip = el.evaluate(_ELEMENT_CLIP_JS)
+        if clip["width"] > 0 and clip["height"] > 0:
+            data = _cdp_session(el.page).send("Page.captureScreenshot", {
+                "format": "png",
+                "clip": {**clip, "scale": 1},
+                "captureBeyondViewport": True,
+            })
+            return base64.b64decode(data["data"])
+    except Exception as e:
+        print(f"[WARN] CDP screenshot failed, falling back: {e}", flush=True)
+    el.scroll_into_view_if_needed()
+    return el.screenshot()
 
-def save_calendar_assets(cal_root, outdir: Path, save_ts: bool):
+def save_calendar_assets(cal_root, outdir: Path, save_ts: bool, html: Optional[str] = None):
     latest_html = outdir / "calendar.html"
     latest_png = outdir / "calendar.png"
     ts = _dt.now().strftime("%Y%m%d_%H%M%S")
     html_ts = outdir / f"calendar_{ts}.html"
     png_ts = outdir / f"calendar_{ts}.png"
-    safe_write_text(latest_html, cal_root.evaluate("el => el.outerHTML"))
-    safe_element_screenshot(cal_root, latest_png)
+    # ブラウザからの取得（outerHTML / スクリーンショット）は 1 回ずつ。ディスク書き込みは I/O スレッドへ
+    # 集計時に取得済みの outerHTML があればそれを使う
+    if html is None:
+        html = cal_root.evaluate("el => el.outerHTML")
+    html_bytes = html.encode("utf-8")
     ts_html = ts_png = None
+    # 集計に変化がなく、前回の calendar.html とも同一なら、撮影も書き込みも省く（前回の証跡がそのまま最新）
+    if not save_ts and latest_png.exists():
+        try:
+            if latest_html.read_bytes() == html_bytes:
+                print(f"[INFO] calendar unchanged; keep latest assets in {outdir.name}", flush=True)
+                return latest_html, latest_png, ts_html, ts_png
+        except OSError:
+            pass
+    png_bytes = capture_element_png(cal_root)
+    submit_io(safe_write_bytes, latest_html, html_bytes)
+    submit_io(safe_write_bytes, latest_png, png_bytes)
     if save_ts:
-        safe_write_text(html_ts, cal_root.evaluate("el => el.outerHTML"))
-        safe_element_screenshot(cal_root, png_ts)
+        submit_io(safe_write_bytes, html_ts, html_bytes)
+        submit_io(safe_write_bytes, png_ts, png_bytes)
         ts_html, ts_png = html_ts, png_ts
     return latest_html, latest_png, ts_html, ts_png
 
+def _prune_oldest(outdir: Path, pattern: str, keep: int) -> None:
+    """ pattern に一致するファイルを mtime の新しい順に keep 件だけ残す（古い分だけ部分ソートで抽出） """
+    with os.scandir(outdir) as it:
+        entries = [(e.stat().st_mtime, e.path) for e in it
+                   if fnmatch.fnmatchcase(e.name, pattern) and e.is_file()]
+    if len(entries) <= keep:
+        return
+    for _, path in heapq.nsmallest(len(entries) - keep, entries):
+        try: os.unlink(path)
+        except Exception: pass
+
 def rotate_snapshot_files(outdir: Path, max_png: int = 50, max_html: int = 50) -> None:
     try:
-        png_ts = sorted(
-            [p for p in outdir.glob("calendar_*.png") if p.is_file()],
-            key=lambda p: p.stat().st_mtime
-        )
-        if len(png_ts) > max_png:
-            for p in png_ts[: len(png_ts) - max_png]:
-                try: p.unlink()
-                except Exception: pass
-        html_ts = sorted(
-            [p for p in outdir.glob("calendar_*.html") if p.is_file()],
-            key=lambda p: p.stat().st_mtime
-        )
-        if len(html_ts) > max_html:
-            for p in html_ts[: len(html_ts) - max_html]:
-                try: p.unlink()
-                except Exception: pass
+        _prune_oldest(outdir, "calendar_*.png", max_png)
+        _prune_oldest(outdir, "calendar_*.html", max_html)
     except Exception as e:
         print(f"[WARN] rotate_snapshot_files failed: {e}", flush=True)
 
 # ====== Discord（従来：差分通知） ======
-IMPROVE_TRANSITIONS = {
+IMPROVE_TRANSITIONS = frozenset({
     ("×", "△"),
     ("△", "○"),
     ("×", "○"),
     ("未判定", "△"),
     ("未判定", "○"),
-}
+})
+@lru_cache(maxsize=512)
 def _parse_month_text(month_text: str) -> Optional[Tuple[int, int]]:
-    m = re.match(r"(\d{4})年(\d{1,2})月", month_text or "")
+    m = _YM_MATCH_RE.match(month_text or "")
     if not m: return None
     return int(m.group(1)), int(m.group(2))
 
+@lru_cache(maxsize=512)
 def _day_str_to_int(day_str: str) -> Optional[int]:
-    m = re.search(r"([1-9]\d?|1\d|2\d|3[01])\s*日", day_str or "")
+    m = _DAY_RE.search(day_str or "")
     return int(m.group(1)) if m else None
 
+_WEEKDAY_JP = ("月","火","水","木","金","土","日")
 def _weekday_jp(dt: datetime.date) -> str:
-    names = ["月","火","水","木","金","土","日"]
-    return names[dt.weekday()]
+    return _WEEKDAY_JP[dt.weekday()]
+
+_jpholiday: Dict[str, Any] = {"loaded": False, "mod": None}
+def _get_jpholiday():
+    """ 祝日判定（任意）は初めて必要になった時点で import """
+    if not _jpholiday["loaded"]:
+        try:
+            import jpholiday
+            _jpholiday["mod"] = jpholiday
+        except Exception:
+            _jpholiday["mod"] = None
+        _jpholiday["loaded"] = True
+    return _jpholiday["mod"]
+
+@lru_cache(maxsize=64)
+def _month_holidays(y: int, mo: int) -> FrozenSet[datetime.date]:
+    """ 当月の祝日を 1 回だけ求める（同じ月の日付判定で jpholiday を繰り返し走査しない） """
+    jpholiday = _get_jpholiday()
+    if jpholiday is None: return frozenset()
+    return frozenset(d for d, _name in jpholiday.month_holidays(y, mo))
 
 def _is_japanese_holiday(dt: datetime.date) -> bool:
     if not INCLUDE_HOLIDAY_FLAG: return False
-    if jpholiday is None: return False
-    try: return jpholiday.is_holiday(dt)
+    try: return dt in _month_holidays(dt.year, dt.month)
     except Exception: return False
 
 DISCORD_CONTENT_LIMIT = 2000
 DISCORD_EMBED_DESC_LIMIT = 4096
+
+# Webhook 送信用の共有セッション（keep-alive で TLS ハンドシェイクを施設・月をまたいで再利用）
+def _build_http_session() -> requests.Session:
+    s = requests.Session()
+    # POST は冪等でないため、再送は「接続できなかった」場合だけ（受理済みかもしれない 5xx・読み取りタイムアウトは再送しない）
+    # 429 は _post 側で Retry-After を見て待機
+    retry = Retry(
+        total=2, connect=2, read=0, status=0, other=0, backoff_factor=0.5,
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False,
+    )
+    s.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry))
+    s.headers.update({"Content-Type": "application/json"})
+    return s
+
+_HTTP = _build_http_session()
+
+# 送信前のトークンバケット（Webhook の目安 5 件 / 2 秒）。429 を受けてから待つのではなく事前に間隔を空ける
+DISCORD_BUCKET_CAPACITY = 5.0
+DISCORD_BUCKET_REFILL_PER_SEC = 5.0 / 2.0
+DISCORD_BACKOFF_BASE_SEC = 0.5
+_bucket = {"tokens": DISCORD_BUCKET_CAPACITY, "ts": time.monotonic()}
+_bucket_lock = threading.Lock()
+
+def _acquire_token() -> None:
+    """ トークンを 1 つ予約し、不足分だけ待つ（不足時は負の残高で後続の待ち時間に反映） """
+    with _bucket_lock:
+        now = time.monotonic()
+        tokens = min(DISCORD_BUCKET_CAPACITY,
+                     _bucket["tokens"] + (now - _bucket["ts"]) * DISCORD_BUCKET_REFILL_PER_SEC)
+        wait = 0.0 if tokens >= 1.0 else (1.0 - tokens) / DISCORD_BUCKET_REFILL_PER_SEC
+        _bucket["tokens"] = tokens - 1.0
+        _bucket["ts"] = now
+    if wait > 0:
+        time.sleep(wait)
+
+def _drain_tokens() -> None:
+    """ 429 受信時：残トークンを捨て、以降の送信も補充待ちにする """
+    with _bucket_lock:
+        _bucket["tokens"] = min(_bucket["tokens"], 0.0)
+        _bucket["ts"] = time.monotonic()
+
+def _respect_rate_limit_headers(headers) -> None:
+    """ X-RateLimit-Remaining が 0 なら、Reset-After 秒が経つまで次のトークンを出さない """
+    try:
+        if headers.get("X-RateLimit-Remaining") != "0":
+            return
+        reset_after = float(headers.get("X-RateLimit-Reset-After") or 0.0)
+    except Exception:
+        return
+    if reset_after <= 0:
+        return
+    with _bucket_lock:
+        _bucket["tokens"] = min(_bucket["tokens"], 1.0 - reset_after * DISCORD_BUCKET_REFILL_PER_SEC)
+        _bucket["ts"] = time.monotonic()
+
 def _split_content(s: str, limit: int = DISCORD_CONTENT_LIMIT) -> List[str]:
+    """ 末尾を作り直さず、開始位置だけを進めて分割（完成したページのみ切り出す） """
     out: List[str] = []
-    cur = (s or "").strip()
-    while len(cur) > limit:
-        cut = cur.rfind("\n", 0, limit)
-        if cut < 0: cut = cur.rfind(" ", 0, limit)
-        if cut < 0: cut = limit
-        out.append(cur[:cut].rstrip())
-        cur = cur[cut:].lstrip()
-    if cur:
-        out.append(cur)
+    text = (s or "").strip()
+    start, n = 0, len(text)
+    while n - start > limit:
+        end = start + limit
+        cut = text.rfind("\n", start, end)
+        if cut < 0: cut = text.rfind(" ", start, end)
+        if cut < 0: cut = end
+        out.append(text[start:cut].rstrip())
+        start = cut
+        while start < n and text[start].isspace():
+            start += 1
+    if start < n:
+        out.append(text[start:])
     return out
 
 def _truncate_embed_description(desc: str) -> str:
@@ -815,24 +1165,55 @@ def _truncate_embed_description(desc: str) -> str:
     if len(desc) <= DISCORD_EMBED_DESC_LIMIT: return desc
     return desc[:DISCORD_EMBED_DESC_LIMIT - 3] + "..."
 
-def _build_mention_and_allowed() -> Tuple[str, Dict[str, Any]]:
-    mention = ""
-    allowed: Dict[str, Any] = {}
+@lru_cache(maxsize=1)
+def _mention_and_allowed_cached() -> Tuple[str, Tuple[str, ...], Tuple[str, ...]]:
+    """ (mention, parse, users) をハッシュ可能な形で 1 回だけ算出（実行中に環境変数は変わらない） """
     uid = os.getenv("DISCORD_MENTION_USER_ID", "").strip()
     use_everyone = os.getenv("DISCORD_USE_EVERYONE", "0").strip() == "1"
     use_here = os.getenv("DISCORD_USE_HERE", "0").strip() == "1"
     if uid:
-        mention = f"<@{uid}>"
-        allowed = {"allowed_mentions": {"parse": [], "users": [uid]}}
-    elif use_everyone:
-        mention = "@everyone"
-        allowed = {"allowed_mentions": {"parse": ["everyone"]}}
-    elif use_here:
-        mention = "@here"
-        allowed = {"allowed_mentions": {"parse": []}}
-    else:
-        allowed = {"allowed_mentions": {"parse": []}}
-    return mention, allowed
+        return f"<@{uid}>", (), (uid,)
+    if use_everyone:
+        return "@everyone", ("everyone",), ()
+    if use_here:
+        return "@here", (), ()
+    return "", (), ()
+
+def _build_mention_and_allowed() -> Tuple[str, Dict[str, Any]]:
+    mention, parse, users = _mention_and_allowed_cached()
+    allowed_mentions: Dict[str, Any] = {"parse": list(parse)}
+    if users:
+        allowed_mentions["users"] = list(users)
+    return mention, {"allowed_mentions": allowed_mentions}
+
+DISCORD_EMBEDS_PER_MESSAGE = 10
+DISCORD_EMBEDS_TOTAL_LIMIT = 6000
+
+def _build_embeds(title: str, description: str, color: int, footer_text: str) -> List[Dict[str, Any]]:
+    """
+    説明文を embed 上限（4096 字）ごとに分け、1 メッセージ（最大 10 embed / 合計 6000 字）に詰める。
+    収まらない場合は従来どおり切り詰めた 1 embed にする
+    """
+    pages = _split_content(description, limit=DISCORD_EMBED_DESC_LIMIT) or [""]
+    total = len(title) + len(footer_text) + sum(len(p) for p in pages)
+    if len(pages) > DISCORD_EMBEDS_PER_MESSAGE or total > DISCORD_EMBEDS_TOTAL_LIMIT:
+        return [{
+            "title": title,
+            "description": _truncate_embed_description(description),
+            "color": color,
+            "timestamp": jst_now().isoformat(),
+            "footer": {"text": footer_text},
+        }]
+    embeds: List[Dict[str, Any]] = []
+    for i, page in enumerate(pages):
+        embed: Dict[str, Any] = {"description": page, "color": color}
+        if i == 0:
+            embed["title"] = title
+        if i == len(pages) - 1:
+            embed["timestamp"] = jst_now().isoformat()
+            embed["footer"] = {"text": footer_text}
+        embeds.append(embed)
+    return embeds
 
 class DiscordWebhookClient:
     def __init__(self, webhook_url: str, thread_id: Optional[str] = None, wait: bool = True,
@@ -843,7 +1224,7 @@ class DiscordWebhookClient:
         self.thread_id = thread_id
         self.wait = wait
         self.timeout_sec = timeout_sec
-        self.user_agent = user_agent or "facility-monitor/1.0 (+python-urllib)"
+        self.user_agent = user_agent or "facility-monitor/1.0 (+python-requests)"
 
     @staticmethod
     def from_env() -> "DiscordWebhookClient":
@@ -854,54 +1235,42 @@ class DiscordWebhookClient:
         return DiscordWebhookClient(webhook_url=url, thread_id=th, wait=wt, user_agent=ua)
 
     def _post(self, payload: Dict[str, Any]) -> Tuple[int, str, Dict[str, Any]]:
-        import urllib.request, urllib.error, ssl
         data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
         url = self.webhook_url
         params = []
         if self.wait: params.append("wait=true")
         if self.thread_id: params.append(f"thread_id={self.thread_id}")
         if params: url = f"{url}?{'&'.join(params)}"
-        req = urllib.request.Request(url=url, data=data,
-                                     headers={"Content-Type": "application/json", "User-Agent": self.user_agent})
-        ctx = ssl.create_default_context()
+        headers = {"User-Agent": self.user_agent}
         tries = 0
         max_tries = 3
         while True:
             tries += 1
+            _acquire_token()
             try:
-                with urllib.request.urlopen(req, context=ctx, timeout=self.timeout_sec) as resp:
-                    body = resp.read().decode("utf-8", errors="ignore")
-                    status = getattr(resp, "status", 200)
-                    headers = dict(resp.headers) if resp.headers else {}
-                    return status, body, headers
-            except urllib.error.HTTPError as e:
-                status = e.code
-                try:
-                    body = e.read().decode("utf-8", errors="ignore")
-                except Exception:
-                    body = ""
-                headers = dict(e.headers) if e.headers else {}
-                if status == 429 and tries < max_tries:
-                    retry_after = float(headers.get("Retry-After", "1.0"))
-                    print(f"[WARN] Discord 429: retry_after={retry_after}s; body={body}", flush=True)
-                    time.sleep(max(0.5, retry_after))
-                    continue
-                return status, body, headers
+                resp = _HTTP.post(url, data=data, headers=headers, timeout=self.timeout_sec)
             except Exception as e:
                 return -1, f"Exception: {e}", {}
+            status = resp.status_code
+            body = resp.text or ""
+            resp_headers = dict(resp.headers) if resp.headers else {}
+            _respect_rate_limit_headers(resp.headers)  # 429 を受ける前に Discord 側の残数で減速
+            if status == 429:
+                _drain_tokens()
+            if status == 429 and tries < max_tries:
+                retry_after = float(resp.headers.get("Retry-After", "1.0"))
+                delay = max(retry_after, DISCORD_BACKOFF_BASE_SEC * (2 ** tries)) + random.uniform(0, 0.5)
+                print(f"[WARN] Discord 429: retry_after={retry_after}s sleep={delay:.2f}s; body={body}", flush=True)
+                time.sleep(delay)
+                continue
+            return status, body, resp_headers
 
     def send_embed(self, title: str, description: str, color: int = 0x00B894, footer_text: str = "Facility monitor") -> bool:
         mention, allowed = _build_mention_and_allowed()
         one_line = (description or "").splitlines()[0] if description else ""
         content = f"{mention} **{title}** — {one_line}".strip() if (mention or one_line or title) else ""
-        embed = {
-            "title": title,
-            "description": _truncate_embed_description(description or ""),
-            "color": color,
-            "timestamp": jst_now().isoformat(),
-            "footer": {"text": footer_text},
-        }
-        payload = {"content": content, "embeds": [embed], **allowed}
+        embeds = _build_embeds(title, description or "", color, footer_text)
+        payload = {"content": content, "embeds": embeds, **allowed}
         print("[DEBUG] payload preview:", json.dumps(payload, ensure_ascii=False), flush=True)
         status, body, headers = self._post(payload)
         if status in (200, 204):
@@ -935,27 +1304,64 @@ class DiscordWebhookClient:
 
    
 # 施設ごとの色（通知 embed 用）
-_FACILITY_ALIAS_COLOR_HEX = {
-    "南浦和": "0x3498DB",  # Blue
-    "岩槻": "0x2ECC71",    # Green
-    "鈴谷": "0xF1C40F",    # Yellow
-    "岸町": "0xE74C3C",    # Red
-    "駒場": "0x8E44AD",    # Purple-ish
+_FACILITY_COLOR = {
+    "南浦和": 0x3498DB,  # Blue
+    "岩槻": 0x2ECC71,    # Green
+    "鈴谷": 0xF1C40F,    # Yellow
+    "岸町": 0xE74C3C,    # Red
+    "駒場": 0x8E44AD,    # Purple-ish
 }
-_DEFAULT_COLOR_HEX = "0x00B894"
-def _hex_to_int(hex_str: str) -> int:
+_DEFAULT_COLOR = 0x00B894
+
+
+# 同一内容の重複通知抑止（月フォルダごとの _notified.json に {key: 送信時刻(epoch)} を保持）
+NOTIFIED_FILE_NAME = "_notified.json"
+NOTIFIED_KEEP = 512
+
+def _notify_key(short: str, month_text: str, lines: List[str]) -> str:
+    return hashlib.blake2b("\x00".join([short or "", month_text or "", *lines]).encode("utf-8"), digest_size=16).hexdigest()
+
+def _load_notified(outdir: Path) -> Dict[str, float]:
+    p = outdir / NOTIFIED_FILE_NAME
     try:
-        return int(hex_str, 16)
+        data = _loads(p.read_bytes())
+        return {str(k): float(v) for k, v in data.items()} if isinstance(data, dict) else {}
     except Exception:
-        return int(_DEFAULT_COLOR_HEX, 16)
+        return {}
 
+def _is_recent_duplicate(outdir: Path, facility_alias: str, month_text: str, lines: List[str]) -> bool:
+    """ 直近 NOTIFY_DEDUP_MINUTES 分以内に同一内容を送っていれば True（ログも出す） """
+    if NOTIFY_DEDUP_MINUTES <= 0:
+        return False
+    sent_at = _load_notified(outdir).get(_notify_key(facility_alias, month_text, lines))
+    if sent_at is not None and time.time() - sent_at < NOTIFY_DEDUP_MINUTES * 60:
+        print(f"[INFO] skip duplicate notification: {facility_alias} {month_text} ({len(lines)} lines)", flush=True)
+        return True
+    return False
+
+def _record_notified(outdir: Path, facility_alias: str, month_text: str, lines: List[str]) -> None:
+    if NOTIFY_DEDUP_MINUTES <= 0:
+        return
+    notified = _load_notified(outdir)
+    notified[_notify_key(facility_alias, month_text, lines)] = time.time()
+    if len(notified) > NOTIFIED_KEEP:
+        notified = dict(sorted(notified.items(), key=lambda kv: kv[1])[-NOTIFIED_KEEP:])
+    try:
+        safe_write_bytes(outdir / NOTIFIED_FILE_NAME, _dumps(notified))
+    except Exception as e:
+        print(f"[WARN] notified state save failed: {e}", flush=True)
 
-def send_aggregate_lines(webhook_url: Optional[str], facility_alias: str, month_text: str, lines: List[str]) -> None:
+def send_aggregate_lines_once(outdir: Path, webhook_url: Optional[str], facility_alias: str, month_text: str, lines: List[str]) -> None:
+    """ 直近 NOTIFY_DEDUP_MINUTES 分以内に同一内容を送っていれば HTTP を発行せずスキップ """
     if not webhook_url or not lines:
         return
+    if _is_recent_duplicate(outdir, facility_alias, month_text, lines):
+        return
+    if send_aggregate_lines(webhook_url, facility_alias, month_text, lines):
+        _record_notified(outdir, facility_alias, month_text, lines)
 
-    # 既存の設定（テキスト強制・行数制限）
-    force_text = (os.getenv("DISCORD_FORCE_TEXT", "0").strip() == "1")
+def _limit_lines(lines: List[str]) -> List[str]:
+    """ DISCORD_MAX_LINES を超える分は「... ほか N 件」にまとめる """
     max_lines_env = os.getenv("DISCORD_MAX_LINES", "").strip()
     max_lines = None
     try:
@@ -965,6 +1371,16 @@ def send_aggregate_lines(webhook_url: Optional[str], facility_alias: str, month_
         max_lines = None
     if max_lines is not None and len(lines) > max_lines:
         lines = lines[:max_lines] + [f"... ほか {len(lines) - max_lines} 件"]
+    return lines
+
+def send_aggregate_lines(webhook_url: Optional[str], facility_alias: str, month_text: str, lines: List[str]) -> bool:
+    """ 送信に成功したら True（URL・行が空なら何もせず False） """
+    if not webhook_url or not lines:
+        return False
+
+    # 既存の設定（テキスト強制・行数制限）
+    force_text = (os.getenv("DISCORD_FORCE_TEXT", "0").strip() == "1")
+    lines = _limit_lines(lines)
 
     # 件名・本文の組み立て（従来どおり）
     title = f"{facility_alias}"
@@ -976,8 +1392,7 @@ def send_aggregate_lines(webhook_url: Optional[str], facility_alias: str, month_
     #     @everyone/@here は allowed_mentions の parse に応じて許可
 
     # 色（embed用）
-    color_hex = _FACILITY_ALIAS_COLOR_HEX.get(facility_alias, _DEFAULT_COLOR_HEX)
-    color_int = _hex_to_int(color_hex)
+    color_int = _FACILITY_COLOR.get(facility_alias, _DEFAULT_COLOR)
 
     # Webhookクライアント
     client = DiscordWebhookClient.from_env()
@@ -988,12 +1403,103 @@ def send_aggregate_lines(webhook_url: Optional[str], facility_alias: str, month_
         content = f"{mention} **{title}**\n{description}".strip()  # ★ 冒頭にメンションを付与
         payload = {"content": content, **allowed}
         # 直接送る（client.send_text に渡す／または簡易POSTでもOKだが既存に合わせる）
-        client.send_text(content)  # allowed は client 内部で扱うため、必要なら send_text 実装をallowed対応へ拡張
-        return
+        return client.send_text(content)  # allowed は client 内部で扱うため、必要なら send_text 実装をallowed対応へ拡張
 
     # embed送信（こちらは client.send_embed が mention＋allowed を扱える設計）
     # client.send_embed() は content に mention を付け、allowed_mentions を使用します
-    client.send_embed(title=title, description=description, color=color_int, footer_text="Facility monitor")
+    return client.send_embed(title=title, description=description, color=color_int, footer_text="Facility monitor")
+
+
+def _embed_chars(embed: Dict[str, Any]) -> int:
+    return len(embed.get("title", "")) + len(embed.get("description", "")) + len((embed.get("footer") or {}).get("text", ""))
+
+class WebhookBatcher:
+    """
+    施設×月の通知をためておき、実行の最後に Webhook ごとにまとめて送る。
+    1 投稿に最大 10 embed / 合計 6000 字まで詰め、失敗した投稿は従来の個別送信へフォールバック
+    """
+    def __init__(self):
+        self._items: List[Tuple[Path, str, str, str, List[str]]] = []
+        self._lock = threading.Lock()
+
+    def add(self, outdir: Path, webhook_url: Optional[str], facility_alias: str, month_text: str, lines: List[str]) -> None:
+        if not webhook_url or not lines:
+            return
+        if _is_recent_duplicate(outdir, facility_alias, month_text, lines):
+            return
+        with self._lock:
+            self._items.append((outdir, webhook_url, facility_alias, month_text, list(lines)))
+        print(f"[INFO] queued notification: {facility_alias} {month_text} ({len(lines)} lines)", flush=True)
+
+    def flush(self) -> None:
+        with self._lock:
+            items, self._items = self._items, []
+        if not items:
+            return
+        force_text = (os.getenv("DISCORD_FORCE_TEXT", "0").strip() == "1")
+        by_url: Dict[str, List[Tuple[Path, str, str, str, List[str]]]] = {}
+        for item in items:
+            by_url.setdefault(item[1], []).append(item)
+        for url, group in by_url.items():
+            if force_text:
+                for outdir, _, alias, month_text, lines in group:
+                    if send_aggregate_lines(url, alias, month_text, lines):
+                        _record_notified(outdir, alias, month_text, lines)
+                continue
+            for chunk in self._pack(group):
+                self._send_chunk(url, chunk)
+
+    @staticmethod
+    def _pack(group):
+        """ [(item, embeds)] を 1 投稿に収まる単位へ分ける（施設×月の embed 群は分割しない） """
+        chunks: List[List[Tuple[Tuple[Path, str, str, str, List[str]], List[Dict[str, Any]]]]] = []
+        cur: List[Tuple[Tuple[Path, str, str, str, List[str]], List[Dict[str, Any]]]] = []
+        cur_n = cur_chars = 0
+        for item in group:
+            alias = item[2]
+            description = "\n".join(_limit_lines(item[4]))
+            color = _FACILITY_COLOR.get(alias, _DEFAULT_COLOR)
+            embeds = _build_embeds(alias, description, color, "Facility monitor")
+            n, chars = len(embeds), sum(_embed_chars(e) for e in embeds)
+            if cur and (cur_n + n > DISCORD_EMBEDS_PER_MESSAGE or cur_chars + chars > DISCORD_EMBEDS_TOTAL_LIMIT):
+                chunks.append(cur)
+                cur, cur_n, cur_chars = [], 0, 0
+            cur.append((item, embeds))
+            cur_n += n
+            cur_chars += chars
+        if cur:
+            chunks.append(cur)
+        return chunks
+
+    @staticmethod
+    def _send_chunk(url: str, chunk) -> None:
+        client = DiscordWebhookClient.from_env()
+        client.webhook_url = url
+        mention, allowed = _build_mention_and_allowed()
+        aliases = list(dict.fromkeys(item[2] for item, _ in chunk))
+        content = f"{mention} **{' / '.join(aliases)}**".strip()
+        embeds = [e for _, es in chunk for e in es]
+        payload = {"content": content, "embeds": embeds, **allowed}
+        print("[DEBUG] payload preview:", json.dumps(payload, ensure_ascii=False), flush=True)
+        status, body, _ = client._post(payload)
+        if status in (200, 204):
+            print(f"[INFO] Discord notified (batched): {len(chunk)} notifications / {len(embeds)} embeds body={body}", flush=True)
+            for (outdir, _, alias, month_text, lines), _ in chunk:
+                _record_notified(outdir, alias, month_text, lines)
+            return
+        print(f"[WARN] batched embed failed: HTTP {status}; body={body}. Falling back to per-facility send.", flush=True)
+        for (outdir, _, alias, month_text, lines), _ in chunk:
+            if send_aggregate_lines(url, alias, month_text, lines):
+                _record_notified(outdir, alias, month_text, lines)
+
+BATCHER = WebhookBatcher()
+
+def notify_time_lines(outdir: Path, facility_alias: str, month_text: str, lines: List[str]) -> None:
+    """ DISCORD_BATCH=1 なら実行末尾のまとめ送信へ、0（既定）なら即時送信 """
+    if DISCORD_BATCH:
+        BATCHER.add(outdir, DISCORD_WEBHOOK_URL, facility_alias, month_text, lines)
+    else:
+        send_aggregate_lines_once(outdir, DISCORD_WEBHOOK_URL, facility_alias, month_text, lines)
 
 
 # ====== ★戻る／施設選択／部屋選択 ======
@@ -1012,14 +1518,22 @@ def back_to_facility_list(page) -> bool:
             print(f"[WARN] back_to_facility_list: click failed: {e}", flush=True)
             ...
             return False
+    # 館選択 / 施設選択のどちらに戻ったかを 1 回の待機で判定（従来は館選択を待ち切ってから施設選択を確認）
+    build_sel = "table.tcontent a[href*='gRsvWTransInstSrchInstAction']"
+    inst_sel = "table.tcontent a[href^='javascript:sendInstNo']"
+    landed = None
     try:
-        page.wait_for_selector("table.tcontent a[href*='gRsvWTransInstSrchInstAction']", timeout=1200)
-        print("[INFO] back_to_facility_list: returned to BUILD list (館選択)", flush=True)
-        return True
+        page.wait_for_selector(f"{build_sel}, {inst_sel}", timeout=2400)
+        landed = page.evaluate(
+            "([b, i]) => document.querySelector(b) ? 'build' : (document.querySelector(i) ? 'inst' : null)",
+            [build_sel, inst_sel],
+        )
     except Exception:
         pass
-    try:
-        page.wait_for_selector("table.tcontent a[href^='javascript:sendInstNo']", timeout=1200)
+    if landed == "build":
+        print("[INFO] back_to_facility_list: returned to BUILD list (館選択)", flush=True)
+        return True
+    if landed == "inst":
         print("[INFO] back_to_facility_list: returned to INST list (施設選択) -> pressing back to BUILD list", flush=True)
         back_sel_build = "a[href*='gRsvWTransInstSrchBuildPageMoveAction']"
         try:
@@ -1027,17 +1541,15 @@ def back_to_facility_list(page) -> bool:
             if el2 and el2.count() > 0:
                 el2.scroll_into_view_if_needed()
                 el2.click(timeout=3000)
-                page.wait_for_selector("table.tcontent a[href*='gRsvWTransInstSrchInstAction']", timeout=2000)
+                page.wait_for_selector(build_sel, timeout=2000)
                 print("[INFO] back_to_facility_list: now at BUILD list (館選択)", flush=True)
                 return True
         except Exception as e:
             print(f"[WARN] back_to_facility_list: second back to BUILD failed: {e}", flush=True)
-    except Exception:
-        pass
     print("[WARN] back_to_facility_list: facility/build list not appeared after back.", flush=True)
     dbg = OUTPUT_ROOT / "_debug"; dbg.mkdir(parents=True, exist_ok=True)
     page.screenshot(path=str(dbg / f"facility_list_not_appeared_{int(time.time())}.png"))
-    safe_write_text(dbg / f"facility_list_not_appeared_{int(time.time())}.html", page.inner_html("body"))
+    dump_page_html(page, dbg / f"facility_list_not_appeared_{int(time.time())}.html")
     return False
 
 def select_facility_by_code(page, code: str, cfg: Dict[str, Any]) -> bool:
@@ -1066,7 +1578,7 @@ def select_facility_by_code(page, code: str, cfg: Dict[str, Any]) -> bool:
         pass
     dbg = OUTPUT_ROOT / "_debug"; dbg.mkdir(parents=True, exist_ok=True)
     page.screenshot(path=str(dbg / f"select_facility_failed_{code}_{int(time.time())}.png"))
-    safe_write_text(dbg / f"select_facility_failed_{code}_{int(time.time())}.html", page.inner_html("body"))
+    dump_page_html(page, dbg / f"select_facility_failed_{code}_{int(time.time())}.html")
     return False
 
 def apply_post_facility_steps(page, facility: Dict[str, Any]) -> None:
@@ -1096,7 +1608,7 @@ def apply_post_facility_steps(page, facility: Dict[str, Any]) -> None:
                         print(f"[WARN] apply_post_facility_steps: not found '{label}'", flush=True)
                         dbg = OUTPUT_ROOT / "_debug"; dbg.mkdir(parents=True, exist_ok=True)
                         page.screenshot(path=str(dbg / f"post_step_not_found_{label}_{int(time.time())}.png"))
-                        safe_write_text(dbg / f"post_step_not_found_{label}_{int(time.time())}.html", page.inner_html("body"))
+                        dump_page_html(page, dbg / f"post_step_not_found_{label}_{int(time.time())}.html")
                 hint = hints.get(label, "")
                 if hint:
                     try:
@@ -1107,6 +1619,7 @@ def apply_post_facility_steps(page, facility: Dict[str, Any]) -> None:
                 print(f"[WARN] apply_post_facility_steps: error on '{label}': {e}", flush=True)
 
 # ====== ★ここから：時間帯抽出のための追加関数 ======
+@lru_cache(maxsize=4096)
 def _normalize_time_label(s: str) -> str:
     """ 全角→半角、空白除去など軽い正規化 """
     if s is None:
@@ -1114,8 +1627,9 @@ def _normalize_time_label(s: str) -> str:
     z2h = str.maketrans("０１２３４５６７８９　", "0123456789 ")
     return (s.strip().translate(z2h)).replace("~", "～")
 
+@lru_cache(maxsize=4096)
 def map_time_label(facility_alias: str, raw_label: str) -> str:
-    """ 施設別の時間帯ラベルを時刻レンジへ変換 """
+    """ 施設別の時間帯ラベルを時刻レンジへ変換（FACILITY_TIME_MAP は固定なので結果をキャッシュ） """
     label = _normalize_time_label(raw_label)
     m = FACILITY_TIME_MAP.get(facility_alias) or {}
     if label in m:
@@ -1125,77 +1639,112 @@ def map_time_label(facility_alias: str, raw_label: str) -> str:
             return m[key]
     return ""  # 変換不可なら空文字（無視）
 
-def _detect_status_in_cell(cell, config) -> Optional[str]:
-    """ 時間帯セルのステータス（空き or 予約あり 等）を判定 """
-    try:
-        img = cell.locator("img").first
-        if img and img.count() > 0:
-            alt = img.get_attribute("alt") or ""
-            src = img.get_attribute("src") or ""
-            alt_n = alt.strip()
-            if alt_n:
-                if "空き" in alt_n:
-                    return "空き"
-                if "予約あり" in alt_n:
-                    return "予約あり"
-            fname = os.path.basename(src).lower()
-            if "empty" in fname or "lw_0.gif" in fname:
-                return "空き"
-            if "finish" in fname or "lw_100.gif" in fname:
-                return "予約あり"
-            return "その他"
-    except Exception:
-        pass
+# 時間帯セル画像のキーワード（alt / src ファイル名）→ ステータス。1 回の正規表現走査で判定する
+_SLOT_ALT_KEYWORDS = {"空き": "空き", "予約あり": "予約あり"}
+_SLOT_SRC_KEYWORDS = {"empty": "空き", "lw_0.gif": "空き", "finish": "予約あり", "lw_100.gif": "予約あり"}
+def _keyword_alternation(keywords) -> re.Pattern:
+    return re.compile("|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)))
+_SLOT_ALT_RE = _keyword_alternation(_SLOT_ALT_KEYWORDS)
+_SLOT_SRC_RE = _keyword_alternation(_SLOT_SRC_KEYWORDS)
+
+def _status_from_img(alt: str, src: str) -> str:
+    """ 時間帯セル画像の alt / src から判定（空き / 予約あり / その他） """
+    m = _SLOT_ALT_RE.search((alt or "").strip())
+    if m:
+        return _SLOT_ALT_KEYWORDS[m.group(0)]
+    m = _SLOT_SRC_RE.search(os.path.basename(src or "").lower())
+    if m:
+        return _SLOT_SRC_KEYWORDS[m.group(0)]
+    return "その他"
+
+def _detect_status_in_cell(cell: Dict[str, Any]) -> Optional[str]:
+    """ 時間帯セル（_collect_timesheet_column の 1 行分）のステータスを判定 """
+    if cell.get("img"):
+        return _status_from_img(cell.get("alt", ""), cell.get("src", ""))
+    t = cell.get("text") or ""
+    if "空き" in t:
+        return "空き"
+    if "予約あり" in t:
+        return "予約あり"
+    return None
+
+# 時間帯表の各行について「行ラベル＋対象列セルの img/テキスト」を 1 回の evaluate でまとめて取得
+_TIMESHEET_COLUMN_JS = """
+(tbl, col) => Array.from(tbl.querySelectorAll(':scope tbody tr')).map(row => {
+  const cells = row.querySelectorAll(':scope th, :scope td');
+  if (cells.length <= col) return null;
+  const cell = cells[col];
+  const img = cell.querySelector('img');
+  return {
+    label: (cells[0].innerText || '').trim(),
+    img: !!img,
+    alt: img ? (img.getAttribute('alt') || '') : '',
+    src: img ? (img.getAttribute('src') || '') : '',
+    text: img ? '' : (cell.innerText || '').trim(),
+  };
+}).filter(r => r !== null)
+"""
+def _collect_timesheet_column(table, col: int) -> List[Dict[str, Any]]:
+    return table.evaluate(_TIMESHEET_COLUMN_JS, col) or []
+
+# 月表示の各セルについて「本文 / aria-label+title / img の alt+title」を 1 回の evaluate_all で取得
+_DAY_CELL_TEXTS_JS = """
+els => els.map(e => [
+  e.innerText || '',
+  (e.getAttribute('aria-label') || '') + ' ' + (e.getAttribute('title') || ''),
+  Array.from(e.querySelectorAll('img')).map(i => (i.getAttribute('alt') || '') + ' ' + (i.getAttribute('title') || '')).join(' '),
+])
+"""
+@lru_cache(maxsize=32)
+def _day_pat(d: int) -> re.Pattern:
+    """ 'N日' の前が数字でないことを条件に一致（'1日' が '11日' '21日' に一致しないように） """
+    return re.compile(rf"(?:^|[^0-9]){d}\s*日")
+
+@lru_cache(maxsize=64)
+def _select_day_href_pat(y: int, mo: int, d: int) -> re.Pattern:
+    """ selectDay(form, action, n, YYYY, M, D) の末尾 3 引数で当該日のリンクを特定 """
+    return re.compile(rf"selectDay\(.*,\s*{y}\s*,\s*{mo}\s*,\s*{d}\s*\)")
+
+def _find_day_anchor_by_href(calendar_root, month_text: Optional[str], day_int: int):
+    """ selectDay リンクの href を一括取得し、年月日が一致するものを返す（なければ None） """
+    ym = _parse_month_text(month_text or "")
+    if not ym:
+        return None
+    anchors = calendar_root.locator("a[href*='selectDay']")
     try:
-        t = (cell.inner_text() or "").strip()
-        if "空き" in t:
-            return "空き"
-        if "予約あり" in t:
-            return "予約あり"
+        hrefs = anchors.evaluate_all("els => els.map(e => e.getAttribute('href') || '')")
     except Exception:
-        pass
+        return None
+    pat = _select_day_href_pat(ym[0], ym[1], day_int)
+    for i, href in enumerate(hrefs):
+        if pat.search(href):
+            return anchors.nth(i)
     return None
 
-def _find_day_cell_in_month(page, calendar_root, day_int: int):
+def _find_day_cell_in_month(page, calendar_root, day_int: int, month_text: Optional[str] = None):
     """ 月表示カレンダー内から '15日' のような当該日のセル（a/selectDay を優先）を特定 """
-    day_text = f"{day_int}日"
+    a = _find_day_anchor_by_href(calendar_root, month_text, day_int)
+    if a is not None:
+        return a
+    pat = _day_pat(day_int)
     candidates = calendar_root.locator(":scope tbody td, :scope [role='gridcell'], :scope .fc-daygrid-day")
-    cnt = candidates.count()
-    for i in range(cnt):
-        el = candidates.nth(i)
-        try:
-            txt = (el.inner_text() or "")
-            if day_text in txt:
-                a = el.locator("a[href*='selectDay']").first
-                return a if a and a.count() > 0 else el
-        except Exception:
-            pass
-        try:
-            aria = el.get_attribute("aria-label") or ""
-            title = el.get_attribute("title") or ""
-            if day_text in (aria + " " + title):
-                a = el.locator("a[href*='selectDay']").first
-                return a if a and a.count() > 0 else el
-        except Exception:
-            pass
-        try:
-            imgs = el.locator("img")
-            jcnt = imgs.count()
-            for j in range(jcnt):
-                alt = imgs.nth(j).get_attribute("alt") or ""
-                tit = imgs.nth(j).get_attribute("title") or ""
-                if day_text in (alt + " " + tit):
-                    a = el.locator("a[href*='selectDay']").first
-                    return a if a and a.count() > 0 else el
-        except Exception:
-            pass
+    try:
+        data = candidates.evaluate_all(_DAY_CELL_TEXTS_JS)
+    except Exception:
+        return None
+    for i, texts in enumerate(data):
+        if any(pat.search(t) for t in texts):
+            el = candidates.nth(i)
+            a = el.locator("a[href*='selectDay']").first
+            return a if a and a.count() > 0 else el
     return None
 
 
-def _header_patterns(month_text: Optional[str], day_int: int) -> List[re.Pattern]:
-    """ヘッダ表記の揺れを吸収する正規表現の一覧"""
+@lru_cache(maxsize=128)
+def _header_pattern_sources(month_text: Optional[str], day_int: int) -> Tuple[str, ...]:
+    """ヘッダ表記の揺れを吸収する正規表現（文字列）の一覧"""
     pats: List[str] = []
-    m = re.search(r"(\d{4})年(\d{1,2})月", month_text or "")
+    m = _YM_MATCH_RE.search(month_text or "")
     y, mo = (None, None)
     if m:
         y, mo = int(m.group(1)), int(m.group(2))
@@ -1225,8 +1774,39 @@ def _header_patterns(month_text: Optional[str], day_int: int) -> List[re.Pattern
             rf"\b{y}\s*年\s*{mo}\s*月\s*{day_int}\s*日{wk_opt}\b",     # 2026年1月14日[ 曜日]
         ]
 
-    # コンパイル
-    return [re.compile(p) for p in pats]
+    return tuple(pats)
+
+@lru_cache(maxsize=128)
+def _header_patterns(month_text: Optional[str], day_int: int) -> Tuple[re.Pattern, ...]:
+    """ヘッダ表記の正規表現をコンパイル（同じ年月日の組み合わせはキャッシュから返す）"""
+    return tuple(re.compile(p) for p in _header_pattern_sources(month_text, day_int))
+
+# JS の \b は ASCII 単語境界のため、Python（Unicode の \w）と同じ境界を前後の否定先読み・後読みで表す。
+# パターンはすべて \b で始まり \b で終わり、両端の文字は数字・漢字（どちらも \w）なので前後の判定だけで等価
+_JS_WORD_CHAR = r"[\p{L}\p{N}_]"
+@lru_cache(maxsize=128)
+def _header_js_sources(month_text: Optional[str], day_int: int) -> Tuple[str, ...]:
+    out = []
+    for p in _header_pattern_sources(month_text, day_int):
+        body = p[2:-2] if p.startswith(r"\b") and p.endswith(r"\b") else p
+        out.append(f"(?<!{_JS_WORD_CHAR}){body}(?!{_JS_WORD_CHAR})")
+    return tuple(out)
+
+# 時間帯表示のヘッダ（thead → 先頭行 → 全 th の順）に当該日のパターンが現れたら true
+_TIMESHEET_HEADER_READY_JS = """
+(pats) => {
+  const table = document.querySelector('table.akitablelist');
+  if (!table) return false;
+  let ths = table.querySelectorAll(':scope thead th.akitablelist, :scope thead th');
+  if (!ths.length) ths = table.querySelectorAll(':scope > tbody > tr:first-child > th.akitablelist, :scope > tbody > tr:first-child > th');
+  if (!ths.length) ths = table.querySelectorAll(':scope th.akitablelist, :scope th');
+  const res = pats.map(p => new RegExp(p, 'u'));
+  return Array.from(ths).some(th => {
+    const t = (th.innerText || '').replace(/\\n/g, '').trim();
+    return res.some(r => r.test(t));
+  });
+}
+"""
 
 
 def _find_day_col_index_generic(table, day_int: int, month_text: Optional[str]) -> Optional[int]:
@@ -1240,38 +1820,22 @@ def _find_day_col_index_generic(table, day_int: int, month_text: Optional[str])
     # 3) 全ての th（保険）
     if ths.count() == 0:
         ths = table.locator(":scope th.akitablelist, :scope th")
-    cnt = ths.count()
-    for i in range(cnt):
-        t = (ths.nth(i).inner_text() or "").replace("\n", "").strip()
+    texts = ths.evaluate_all("els => els.map(e => e.innerText || '')")
+    for i, raw in enumerate(texts):
+        t = raw.replace("\n", "").strip()
         for rp in pats:
             if rp.search(t):
                 return i
     return None
 
 def _wait_timesheet_ready_for_day(page, day_int: int, month_text: Optional[str], timeout_ms: int = 7000) -> bool:
-    """時間帯表示でヘッダ（表記揺れ許容）が現れるまで待機"""
-    deadline = time.time() + (timeout_ms / 1000.0)
-    while time.time() < deadline:
-        try:
-            tbl = page.locator("table.akitablelist")
-            if tbl.count() > 0:
-                table = tbl.first
-                ths = table.locator(":scope thead th.akitablelist, :scope thead th")
-                if ths.count() == 0:
-                    ths = table.locator(":scope > tbody > tr:first-child > th.akitablelist, :scope > tbody > tr:first-child > th")
-                if ths.count() == 0:
-                    ths = table.locator(":scope th.akitablelist, :scope th")
-                cnt = ths.count()
-                pats = _header_patterns(month_text, day_int)
-                for i in range(cnt):
-                    t = (ths.nth(i).inner_text() or "").replace("\n", "").strip()
-                    for rp in pats:
-                        if rp.search(t):
-                            return True
-        except Exception:
-            pass
-        page.wait_for_timeout(150)
-    return False
+    """時間帯表示でヘッダ（表記揺れ許容）が現れるまで待機（判定はブラウザ側で行い、固定間隔のポーリングはしない）"""
+    try:
+        page.wait_for_function(_TIMESHEET_HEADER_READY_JS, arg=list(_header_js_sources(month_text, day_int)),
+                               timeout=timeout_ms)
+        return True
+    except Exception:
+        return False
 
 def _click_back_to_month(page) -> bool:
     """ 時間帯表示から 'もどる' を押して月表示へ戻る（戻り確認まで行う） """
@@ -1295,7 +1859,7 @@ def _click_back_to_month(page) -> bool:
     if not clicked:
         dbg = OUTPUT_ROOT / "_debug"; dbg.mkdir(parents=True, exist_ok=True)
         page.screenshot(path=str(dbg / f"back_to_month_failed_{int(time.time())}.png"))
-        safe_write_text(dbg / f"back_to_month_failed_{int(time.time())}.html", page.inner_html("body"))
+        dump_page_html(page, dbg / f"back_to_month_failed_{int(time.time())}.html")
         return False
     try:
         page.locator("table.m_akitablelist").first.wait_for(state="visible", timeout=2000)
@@ -1310,7 +1874,7 @@ def goto_day_and_collect_time_ranges(page, calendar_root, day_int: int, facility
     対象日をクリックして時間帯レンジ（空きのみ）を収集し、月表示へ戻る
     - 時間帯表示では "空き" / "予約あり" のみを扱い、"空き" の時間帯だけ返す
     """
-    el = _find_day_cell_in_month(page, calendar_root, day_int)
+    el = _find_day_cell_in_month(page, calendar_root, day_int, month_text)
     if not el:
         print(f"[CLICK] day={day_int}: anchor NOT FOUND (skip)", flush=True)
         return []
@@ -1319,7 +1883,12 @@ def goto_day_and_collect_time_ranges(page, calendar_root, day_int: int, facility
         el.scroll_into_view_if_needed()
         el.click(timeout=3000)
         print(f"[CLICK] day={day_int}: SUCCESS", flush=True)
-        grace_pause(page, "goto day detail")
+        # 固定待機ではなく時間帯表の出現を待つ（出なければ従来の保険待機）
+        try:
+            with time_section("goto day detail: wait timesheet table"):
+                page.wait_for_selector("table.akitablelist", state="attached", timeout=3000)
+        except Exception:
+            grace_pause(page, "goto day detail")
   
         # === 診断追加: クリック直後の画面状態確認（最小差分） ===
         try:
@@ -1330,7 +1899,7 @@ def goto_day_and_collect_time_ranges(page, calendar_root, day_int: int, facility
             print(f"[DEBUG] after-click url='{url_after}' timesheet_table_count={cnt}", flush=True)
             # 証跡（常時1枚）：時間帯表示に遷移できているかを確認
             page.screenshot(path=str(dbg / f"timesheet_after_click_day{day_int}.png"))
-            safe_write_text(dbg / f"timesheet_after_click_day{day_int}.html", page.inner_html("body"))
+            dump_page_html(page, dbg / f"timesheet_after_click_day{day_int}.html")
         except Exception as _e:
             print(f"[DEBUG] after-click evidence save failed: {_e}", flush=True)
           
@@ -1356,7 +1925,7 @@ def goto_day_and_collect_time_ranges(page, calendar_root, day_int: int, facility
             print(f"[DEBUG] header candidates(day={day_int}): {candidates}", flush=True)
             # 証跡: スクリーンショットとHTML断片
             page.screenshot(path=str(dbg / f"timesheet_not_ready_day{day_int}.png"))
-            safe_write_text(dbg / f"timesheet_not_ready_day{day_int}.html", page.inner_html("body"))
+            dump_page_html(page, dbg / f"timesheet_not_ready_day{day_int}.html")
         except Exception as _e:
             print(f"[DEBUG] not-ready evidence save failed: {_e}", flush=True)
 
@@ -1379,16 +1948,9 @@ def goto_day_and_collect_time_ranges(page, calendar_root, day_int: int, facility
         print(f"[STATE] timesheet-view ready: table.akitablelist visible, header for day={day_int} found (col={target_col})", flush=True)
 
         print(f"[SCAN] day={day_int}: collecting '空き' slots...", flush=True)
-        rows = table.locator(":scope tbody tr")
-        rcnt = rows.count()
-        for r in range(rcnt):
-            row = rows.nth(r)
-            cells = row.locator(":scope th, :scope td")
-            if cells.count() <= target_col:
-                continue
-            label_text = (cells.nth(0).inner_text() or "").strip()
-            cell = cells.nth(target_col)
-            st = _detect_status_in_cell(cell, config)
+        for cell in _collect_timesheet_column(table, target_col):
+            label_text = cell.get("label", "")
+            st = _detect_status_in_cell(cell)
             if st == "空き":
                 rng = map_time_label(facility_alias, label_text)
                 if rng:
@@ -1402,39 +1964,49 @@ def goto_day_and_collect_time_ranges(page, calendar_root, day_int: int, facility
     uniq = sorted(set(time_ranges), key=lambda s: _sortkey_time_range(s))
     return uniq
 
+_TIME_RANGE_HEAD_RE = re.compile(r"(\d{1,2})\D+(\d{1,2})")
 def _sortkey_time_range(s: str) -> Tuple[int, int]:
-    m = re.match(r"(\d{1,2})\D+(\d{1,2})", s or "")
+    m = _TIME_RANGE_HEAD_RE.match(s or "")
     if not m:
         return (999, 999)
     return (int(m.group(1)), int(m.group(2)))
 
 def compute_improved_days(prev_details: List[Dict[str, str]], cur_details: List[Dict[str, str]]) -> List[int]:
     prev_map = {}
-    cur_map = {}
     for d in (prev_details or []):
-        m = re.search(r"([1-9]\d?|1\d|2\d|3[01])\s*日", d.get("day",""))
-        if m:
-            prev_map[int(m.group(1))] = d.get("status","未判定")
+        di = _day_str_to_int(d.get("day",""))
+        if di is not None:
+            prev_map[di] = d.get("status","未判定")
+    cur_map = {}
     for d in (cur_details or []):
-        m = re.search(r"([1-9]\d?|1\d|2\d|3[01])\s*日", d.get("day",""))
-        if m:
-            cur_map[int(m.group(1))] = d.get("status","未判定")
-    improved = []
-    for di, cur_st in cur_map.items():
-        prev_st = prev_map.get(di)
-        if prev_st is None:
-            continue
-        if (prev_st, cur_st) in IMPROVE_TRANSITIONS:
-            improved.append(di)
+        di = _day_str_to_int(d.get("day",""))
+        if di is not None:
+            cur_map[di] = d.get("status","未判定")  # 同じ日が重複したら後勝ち
+    # 前回に無い日は (None, 状態) となり IMPROVE_TRANSITIONS に含まれないので対象外
+    improved = [di for di, cur_st in cur_map.items() if (prev_map.get(di), cur_st) in IMPROVE_TRANSITIONS]
     return sorted(improved)
 
+def diff_payloads(prev_payload: Optional[Dict[str, Any]], cur_summary: Dict[str, int],
+                  cur_details: List[Dict[str, str]]) -> Tuple[bool, List[int], List[Dict[str, str]]]:
+    """ 前回 payload との差分を 1 回で算出: (サマリ変化の有無, 改善日, 前回 details) """
+    prev = prev_payload or {}
+    prev_summary = prev.get("summary")
+    prev_details = prev.get("details") or []
+    changed = summaries_changed(prev_summary, cur_summary)
+    # 前回データが無ければ改善日は出ない（前回に無い日は IMPROVE_TRANSITIONS 対象外）
+    if prev_summary is None or not prev_details:
+        return changed, [], prev_details
+    return changed, compute_improved_days(prev_details, cur_details), prev_details
+
 def build_time_increase_lines(page, calendar_root, facility_alias: str, month_text: str,
-                              prev_details: List[Dict[str,str]], cur_details: List[Dict[str,str]], config) -> List[str]:
+                              prev_details: List[Dict[str,str]], cur_details: List[Dict[str,str]], config,
+                              improved_days: Optional[List[int]] = None) -> List[str]:
     ym = _parse_month_text(month_text)
     if not ym:
         return []
     y, mo = ym
-    improved_days = compute_improved_days(prev_details, cur_details)
+    if improved_days is None:
+        improved_days = compute_improved_days(prev_details, cur_details)
     lines: List[str] = []
     for di in improved_days:
         ranges = goto_day_and_collect_time_ranges(page, calendar_root, di, facility_alias, config, month_text)
@@ -1449,6 +2021,152 @@ def build_time_increase_lines(page, calendar_root, facility_alias: str, month_te
     return lines
 
 # ====== メイン（施設単位の保存・通知・月遷移） ======
+def save_status_counts(outdir: Path, facility: Dict[str, Any], month_text: str, summary: Dict[str, int],
+                       details: List[Dict[str, str]], prev_details: List[Dict[str, str]], changed: bool,
+                       run_at: str) -> None:
+    """ status_counts.json を保存。サマリも日別明細も前回と同一なら書き込まない（run_at だけの更新は省く） """
+    if not changed and details == prev_details:
+        print(f"[INFO] status unchanged; keep status_counts.json in {outdir.name}", flush=True)
+        return
+    payload = {
+        "month": month_text, "facility": facility.get('name',''),
+        "summary": summary, "details": details,
+        "run_at": run_at
+    }
+    with time_section("write status_counts.json"):
+        safe_write_bytes(outdir / "status_counts.json", _dumps(payload))
+
+def process_facility(page, facility: Dict[str, Any], config: Dict[str, Any], first: bool,
+                     max_png_default: int, max_html_default: int) -> None:
+    """ 1 施設分：カレンダー到達 → 月ごとの集計・保存・通知 → 月遷移（first=False なら戻る導線で施設を切替） """
+    alias = facility["_short"]
+    if first:
+        print("[INFO] first facility: run full sequence", flush=True)
+        navigate_to_facility(page, facility)
+    else:
+        print("[INFO] trying back from month-view to facility/build list ...", flush=True)
+        ok_back = back_to_facility_list(page)
+        if not ok_back:
+            print("[WARN] back failed; fallback to full sequence", flush=True)
+            navigate_to_facility(page, facility)
+        else:
+            print("[INFO] back succeeded; now selecting next facility by BldCd", flush=True)
+            code = facility.get("facility_code") or FACILITY_ALIAS_TO_BLDCD.get(alias, "")
+            ok_sel = select_facility_by_code(page, code, config)
+            if not ok_sel:
+                print(f"[WARN] BldCd click failed (code={code}); fallback to full sequence", flush=True)
+                navigate_to_facility(page, facility)
+            else:
+                print("[INFO] BldCd click succeeded; applying post-steps (if any)", flush=True)
+                apply_post_facility_steps(page, facility)
+                wait_calendar_ready(page, facility)
+
+    # ===== ここからは従来の保存・通知・月遷移 =====
+    # 実行時刻は施設ごとに 1 回だけ整形し、各月の status_counts.json で共有する
+    run_at = jst_now().strftime("%Y-%m-%d %H:%M:%S JST")
+    with time_section("get_current_year_month_text"):
+        month_text = get_current_year_month_text(page) or "unknown"
+    cal_root = locate_calendar_root(page, month_text or "予約カレンダー", facility)
+    short = alias
+    outdir = facility_month_dir(short or 'unknown_facility', month_text)
+
+    # 月表示サマリ＆改善日
+    cal_html = calendar_outer_html(cal_root)
+    summary, details = summarize_vacancies(page, cal_root, config, html=cal_html)
+    print(f"[SUMMARY] current: ◯={summary['○']} △={summary['△']} ×={summary['×']} 未判定={summary['未判定']}", flush=True)
+    changed, improved_days_head, prev_details = diff_payloads(load_last_payload(outdir), summary, details)
+    print(f"[IMPROVED] days={improved_days_head}", flush=True)
+
+    # 保存
+    latest_html, latest_png, ts_html, ts_png = save_calendar_assets(cal_root, outdir, save_ts=changed, html=cal_html)
+    fac_ret = facility.get("retention") or {}
+    max_png = int(fac_ret.get("max_files_per_month_png", max_png_default))
+    max_html = int(fac_ret.get("max_files_per_month_html", max_html_default))
+    submit_io(rotate_snapshot_files, outdir, max_png, max_html)
+    save_status_counts(outdir, facility, month_text, summary, details, prev_details, changed, run_at)
+    print(f"[INFO] saved: {facility.get('name','')} - {month_text} latest=({latest_html.name},{latest_png.name})", flush=True)
+    if ts_html and ts_png:
+        print(f"[INFO] saved (timestamped): {ts_html.name}, {ts_png.name}", flush=True)
+
+    # ★（1～5）改善日が尽きるまで：クリック→時間帯「空き」検出→月に戻る
+    time_lines = build_time_increase_lines(page, cal_root, short, month_text, prev_details, details, config,
+                                           improved_days=improved_days_head)
+    if time_lines:
+        notify_time_lines(outdir, short, month_text, time_lines)
+
+    # === 6. 月遷移（必ず月表示でのみ） ===
+    shifts = facility.get("month_shifts", [0,1])
+    shifts = sorted(set(int(s) for s in shifts if isinstance(s,(int,float))))
+    if 0 not in shifts: shifts.insert(0,0)
+    max_shift = max(shifts)
+    prev_month_text = month_text
+    for step in range(1, max_shift + 1):
+        ok = click_next_month(page, calendar_root=cal_root, prev_month_text=prev_month_text, facility=facility)
+        if not ok:
+            dbg = OUTPUT_ROOT / "_debug"; safe_mkdir(dbg)
+            with time_section(f"screenshot fail step={step}"):
+                page.screenshot(path=str(dbg / f"failed_next_month_step{step}_{short}.png"))
+            print(f"[WARN] next-month click failed at step={step}", flush=True)
+            break
+        with time_section(f"get_current_month_text(step={step})"):
+            month_text2 = get_current_year_month_text(page) or f"shift_{step}"
+            print(f"[INFO] month(step={step}): {month_text2}", flush=True)
+        cal_root2 = locate_calendar_root(page, month_text2 or "予約カレンダー", facility)
+        outdir2 = facility_month_dir(short or 'unknown_facility', month_text2)
+        print(f"[INFO] outdir(step={step})={outdir2}", flush=True)
+
+        if step in shifts:
+            cal_html2 = calendar_outer_html(cal_root2)
+            summary2, details2 = summarize_vacancies(page, cal_root2, config, html=cal_html2)
+            print(f"[SUMMARY] current: ◯={summary2['○']} △={summary2['△']} ×={summary2['×']} 未判定={summary2['未判定']}", flush=True)
+
+            changed2, improved_days2, prev_details2 = diff_payloads(load_last_payload(outdir2), summary2, details2)
+            print(f"[IMPROVED] days={improved_days2}", flush=True)
+
+            latest_html2, latest_png2, ts_html2, ts_png2 = save_calendar_assets(cal_root2, outdir2, save_ts=changed2, html=cal_html2)
+            submit_io(rotate_snapshot_files, outdir2, max_png, max_html)
+            save_status_counts(outdir2, facility, month_text2, summary2, details2, prev_details2, changed2, run_at)
+            print(f"[INFO] saved: {facility.get('name','')} - {month_text2} latest=({latest_html2.name},{latest_png2.name})", flush=True)
+            if ts_html2 and ts_png2:
+                print(f"[INFO] saved (timestamped): {ts_html2.name}, {ts_png2.name}", flush=True)
+
+            # ★（1～5）翌月以降も同様に
+            time_lines2 = build_time_increase_lines(page, cal_root2, short, month_text2, prev_details2, details2, config,
+                                                     improved_days=improved_days2)
+            if time_lines2:
+                notify_time_lines(outdir2, short, month_text2, time_lines2)
+
+        cal_root = cal_root2
+        prev_month_text = month_text2
+
+
+def _run_facility_batch(items: List[Tuple[int, Dict[str, Any]]], config: Dict[str, Any],
+                        max_png_default: int, max_html_default: int, total: int) -> None:
+    """ 1 ブラウザ・1 コンテキストで施設群を順番に処理（スレッドごとに独立した Playwright を起動） """
+    from playwright.sync_api import sync_playwright  # ブラウザを使う時点で読み込む（起動時間短縮）
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        context = browser.new_context()
+        setup_context(context)
+        page = context.new_page()
+
+        for n, (idx, facility) in enumerate(items):
+            alias = facility["_short"]
+            print(f"[INFO] === Facility stage begin: {alias} (#{idx+1}/{total}) ===", flush=True)
+            try:
+                process_facility(page, facility, config, n == 0, max_png_default, max_html_default)
+            except Exception as e:
+                dbg = OUTPUT_ROOT / "_debug"; safe_mkdir(dbg)
+                shot = dbg / f"exception_{alias}_{int(time.time())}.png"
+                try: page.screenshot(path=str(shot))
+                except Exception: pass
+                dump_page_html(page, dbg / f"exception_{alias}_{int(time.time())}.html")
+                print(f"[ERROR] run_monitor: 施設処理中に例外: {e} (debug: {shot})", flush=True)
+                continue
+
+        wait_io()
+        browser.close()
+
 def run_monitor():
     print("[INFO] run_monitor: start", flush=True)
     print(f"[INFO] BASE_DIR={BASE_DIR} cwd={Path.cwd()} OUTPUT_ROOT={OUTPUT_ROOT}", flush=True)
@@ -1465,140 +2183,30 @@ def run_monitor():
     max_png_default = int(cfg_ret.get("max_files_per_month_png", 50))
     max_html_default = int(cfg_ret.get("max_files_per_month_html", 50))
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        page = context.new_page()
-
-        for idx, facility in enumerate(facilities):
-            alias = FACILITY_TITLE_ALIAS.get(facility.get('name',''), facility.get('name','')) or facility.get('name','')
-            print(f"[INFO] === Facility stage begin: {alias} (#{idx+1}/{len(facilities)}) ===", flush=True)
-            try:
-                if idx == 0:
-                    print("[INFO] first facility: run full sequence", flush=True)
-                    navigate_to_facility(page, facility)
-                else:
-                    print("[INFO] trying back from month-view to facility/build list ...", flush=True)
-                    ok_back = back_to_facility_list(page)
-                    if not ok_back:
-                        print("[WARN] back failed; fallback to full sequence", flush=True)
-                        navigate_to_facility(page, facility)
-                    else:
-                        print("[INFO] back succeeded; now selecting next facility by BldCd", flush=True)
-                        code = facility.get("facility_code") or FACILITY_ALIAS_TO_BLDCD.get(alias, "")
-                        ok_sel = select_facility_by_code(page, code, config)
-                        if not ok_sel:
-                            print(f"[WARN] BldCd click failed (code={code}); fallback to full sequence", flush=True)
-                            navigate_to_facility(page, facility)
-                        else:
-                            print("[INFO] BldCd click succeeded; applying post-steps (if any)", flush=True)
-                            apply_post_facility_steps(page, facility)
-                            wait_calendar_ready(page, facility)
-
-                # ===== ここからは従来の保存・通知・月遷移 =====
-                with time_section("get_current_year_month_text"):
-                    month_text = get_current_year_month_text(page) or "unknown"
-                cal_root = locate_calendar_root(page, month_text or "予約カレンダー", facility)
-                short = alias
-                outdir = facility_month_dir(short or 'unknown_facility', month_text)
-
-                # 月表示サマリ＆改善日
-                summary, details = summarize_vacancies(page, cal_root, config)
-                print(f"[SUMMARY] current: ◯={summary['○']} △={summary['△']} ×={summary['×']} 未判定={summary['未判定']}", flush=True)
-                prev_payload = load_last_payload(outdir)
-                prev_details = (prev_payload or {}).get("details") or []
-                improved_days_head = compute_improved_days(prev_details, details)
-                print(f"[IMPROVED] days={improved_days_head}", flush=True)
-
-                # 保存
-                changed = summaries_changed((prev_payload or {}).get("summary"), summary)
-                latest_html, latest_png, ts_html, ts_png = save_calendar_assets(cal_root, outdir, save_ts=changed)
-                fac_ret = facility.get("retention") or {}
-                max_png = int(fac_ret.get("max_files_per_month_png", max_png_default))
-                max_html = int(fac_ret.get("max_files_per_month_html", max_html_default))
-                rotate_snapshot_files(outdir, max_png=max_png, max_html=max_html)
-                payload = {
-                    "month": month_text, "facility": facility.get('name',''),
-                    "summary": summary, "details": details,
-                    "run_at": jst_now().strftime("%Y-%m-%d %H:%M:%S JST")
-                }
-                with time_section("write status_counts.json"):
-                    safe_write_text(outdir / "status_counts.json", json.dumps(payload, ensure_ascii=False, indent=2))
-                print(f"[INFO] saved: {facility.get('name','')} - {month_text} latest=({latest_html.name},{latest_png.name})", flush=True)
-                if ts_html and ts_png:
-                    print(f"[INFO] saved (timestamped): {ts_html.name}, {ts_png.name}", flush=True)
-
-                # ★（1～5）改善日が尽きるまで：クリック→時間帯「空き」検出→月に戻る
-                time_lines = build_time_increase_lines(page, cal_root, short, month_text, prev_details, details, config)
-                if time_lines:
-                    send_aggregate_lines(DISCORD_WEBHOOK_URL, short, month_text, time_lines)
-
-                # === 6. 月遷移（必ず月表示でのみ） ===
-                shifts = facility.get("month_shifts", [0,1])
-                shifts = sorted(set(int(s) for s in shifts if isinstance(s,(int,float))))
-                if 0 not in shifts: shifts.insert(0,0)
-                max_shift = max(shifts)
-                prev_month_text = month_text
-                for step in range(1, max_shift + 1):
-                    ok = click_next_month(page, calendar_root=cal_root, prev_month_text=prev_month_text,
-                                          wait_timeout_ms=20000, facility=facility)
-                    if not ok:
-                        dbg = OUTPUT_ROOT / "_debug"; safe_mkdir(dbg)
-                        with time_section(f"screenshot fail step={step}"):
-                            page.screenshot(path=str(dbg / f"failed_next_month_step{step}_{short}.png"))
-                        print(f"[WARN] next-month click failed at step={step}", flush=True)
-                        break
-                    with time_section(f"get_current_month_text(step={step})"):
-                        month_text2 = get_current_year_month_text(page) or f"shift_{step}"
-                        print(f"[INFO] month(step={step}): {month_text2}", flush=True)
-                    cal_root2 = locate_calendar_root(page, month_text2 or "予約カレンダー", facility)
-                    outdir2 = facility_month_dir(short or 'unknown_facility', month_text2)
-                    print(f"[INFO] outdir(step={step})={outdir2}", flush=True)
-
-                    if step in shifts:
-                        summary2, details2 = summarize_vacancies(page, cal_root2, config)
-                        print(f"[SUMMARY] current: ◯={summary2['○']} △={summary2['△']} ×={summary2['×']} 未判定={summary2['未判定']}", flush=True)
-
-                        prev_payload2 = load_last_payload(outdir2)
-                        prev_details2 = (prev_payload2 or {}).get("details") or []
-                        improved_days2 = compute_improved_days(prev_details2, details2)
-                        print(f"[IMPROVED] days={improved_days2}", flush=True)
-
-                        changed2 = summaries_changed((prev_payload2 or {}).get("summary"), summary2)
-                        latest_html2, latest_png2, ts_html2, ts_png2 = save_calendar_assets(cal_root2, outdir2, save_ts=changed2)
-                        rotate_snapshot_files(outdir2, max_png=max_png, max_html=max_html)
-                        payload2 = {
-                            "month": month_text2, "facility": facility.get('name',''),
-                            "summary": summary2, "details": details2,
-                            "run_at": jst_now().strftime("%Y-%m-%d %H:%M:%S JST")
-                        }
-                        with time_section("write status_counts.json (step)"):
-                            safe_write_text(outdir2 / "status_counts.json", json.dumps(payload2, ensure_ascii=False, indent=2))
-                        print(f"[INFO] saved: {facility.get('name','')} - {month_text2} latest=({latest_html2.name},{latest_png2.name})", flush=True)
-                        if ts_html2 and ts_png2:
-                            print(f"[INFO] saved (timestamped): {ts_html2.name}, {ts_png2.name}", flush=True)
-
-                        # ★（1～5）翌月以降も同様に
-                        time_lines2 = build_time_increase_lines(page, cal_root2, short, month_text2, prev_details2, details2, config)
-                        if time_lines2:
-                            send_aggregate_lines(DISCORD_WEBHOOK_URL, short, month_text2, time_lines2)
-
-                    cal_root = cal_root2
-                    prev_month_text = month_text2
-
-            except Exception as e:
-                dbg = OUTPUT_ROOT / "_debug"; safe_mkdir(dbg)
-                shot = dbg / f"exception_{alias}_{int(time.time())}.png"
-                try: page.screenshot(path=str(shot))
-                except Exception: pass
-                safe_write_text(dbg / f"exception_{alias}_{int(time.time())}.html", page.inner_html("body"))
-                print(f"[ERROR] run_monitor: 施設処理中に例外: {e} (debug: {shot})", flush=True)
-                continue
-
-        browser.close()
+    workers = max(1, min(MAX_PARALLEL_FACILITIES, len(facilities)))
+    try:
+        if workers == 1:
+            _run_facility_batch(list(enumerate(facilities)), config, max_png_default, max_html_default, len(facilities))
+            return
+        # 施設をワーカーへ振り分け、ブラウザ待ち（ネットワーク I/O）を施設間で重ねる
+        print(f"[INFO] running facilities in parallel: workers={workers}", flush=True)
+        items = list(enumerate(facilities))
+        batches = [items[i::workers] for i in range(workers)]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="facility") as pool:
+            futures = [pool.submit(_run_facility_batch, batch, config, max_png_default, max_html_default, len(facilities))
+                       for batch in batches]
+            for fut in futures:
+                try:
+                    fut.result()
+                except Exception as e:
+                    print(f"[ERROR] run_monitor: worker failed: {e}", flush=True)
+    finally:
+        wait_io()
+        # ためておいた通知をまとめて送信（途中で例外になっても取りこぼさない）
+        with time_section("flush batched notifications"):
+            BATCHER.flush()
 
 def main():
-    import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("--facility", default=None)
     parser.add_argument("--force", action="store_true")
@@ -1617,9 +2225,18 @@ def main():
         targets = [f for f in cfg.get("facilities", []) if f.get("name")==args.facility]
         if not targets:
             print(f"[WARN] facility '{args.facility}' not found in config.json", flush=True); sys.exit(0)
-        cfg["facilities"] = targets
+        # 内部用の "_short" などは読み込み時に付け直すので書き出さない
+        targets = [{k: v for k, v in f.items() if not k.startswith("_")} for f in targets]
+        cfg = {**cfg, "facilities": targets}
         tmp = BASE_DIR / "config.temp.json"
-        tmp.write_text(json.dumps(cfg, ensure_ascii=False, indent=2), "utf-8")
+        payload = json.dumps(cfg, ensure_ascii=False, indent=2).encode("utf-8")
+        # 同じ --facility の再実行では内容が変わらないので書き込みを省く
+        try:
+            unchanged = tmp.read_bytes() == payload
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            safe_write_bytes(tmp, payload)
         global CONFIG_PATH; CONFIG_PATH = tmp
 
     run_monitor()